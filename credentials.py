@@ -0,0 +1,151 @@
+"""
+네이버 검색 API 인증키 풀 (여러 애플리케이션 키 순환 사용)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+.env 의 NAVER_CLIENT_ID / NAVER_CLIENT_SECRET 에 더해
+NAVER_CLIENT_ID_2 / NAVER_CLIENT_SECRET_2 ... 또는
+NAVER_CLIENTS="id1:secret1,id2:secret2" 형식으로 여러 키를 등록할 수 있습니다.
+요청마다 순환(round_robin) 또는 최소 사용(least_used) 방식으로 키를 고르고,
+오류가 난 키는 잠시 쉬게 하며 오늘 쿼터를 다 쓴 키는 제외합니다.
+"""
+
+import os
+import time
+import threading
+from dotenv import load_dotenv
+
+import quota
+
+# Load environment variables
+load_dotenv()
+
+CREDENTIAL_STRATEGY = os.getenv("NAVER_CREDENTIAL_STRATEGY", "round_robin")
+# 오류가 난 키를 쉬게 하는 시간 (초) - 연속 오류마다 두 배, 최대 CREDENTIAL_MAX_COOLDOWN
+CREDENTIAL_COOLDOWN = float(os.getenv("NAVER_CREDENTIAL_COOLDOWN", "30"))
+CREDENTIAL_MAX_COOLDOWN = float(os.getenv("NAVER_CREDENTIAL_MAX_COOLDOWN", "600"))
+
+STRATEGIES = ("round_robin", "least_used")
+
+class MissingCredentials(RuntimeError):
+    """검색 API 인증키가 하나도 설정되지 않음"""
+
+class Credential:
+    """검색 API 애플리케이션 키 한 쌍과 사용 상태"""
+
+    def __init__(self, client_id, client_secret):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def headers(self):
+        """검색 API 인증 헤더"""
+        return {
+            "X-Naver-Client-Id": self.client_id,
+            "X-Naver-Client-Secret": self.client_secret,
+        }
+
+    def __repr__(self):
+        return f"Credential({self.client_id[:6]}..., calls={self.calls}, failures={self.failures})"
+
+def load_credentials():
+    """환경변수에서 (client_id, client_secret) 목록 읽기 (중복 제거)"""
+    pairs = []
+    if os.getenv("NAVER_CLIENT_ID") and os.getenv("NAVER_CLIENT_SECRET"):
+        pairs.append((os.getenv("NAVER_CLIENT_ID"), os.getenv("NAVER_CLIENT_SECRET")))
+    index = 2
+    while os.getenv(f"NAVER_CLIENT_ID_{index}"):
+        pairs.append((os.getenv(f"NAVER_CLIENT_ID_{index}"), os.getenv(f"NAVER_CLIENT_SECRET_{index}", "")))
+        index += 1
+    for entry in os.getenv("NAVER_CLIENTS", "").split(","):
+        if ":" in entry:
+            client_id, client_secret = entry.strip().split(":", 1)
+            pairs.append((client_id, client_secret))
+    return list(dict.fromkeys(pairs))
+
+class CredentialPool:
+    """여러 인증키를 순환/최소 사용 방식으로 배분"""
+
+    def __init__(self, pairs=None, strategy=None, ledger=None):
+        pairs = load_credentials() if pairs is None else pairs
+        self.credentials = [Credential(client_id, client_secret) for client_id, client_secret in pairs]
+        self.strategy = strategy or CREDENTIAL_STRATEGY
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"지원하지 않는 인증키 배분 방식: {self.strategy}")
+        self.ledger = ledger or quota.get_ledger()
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.credentials)
+
+    def _has_quota(self, credential):
+        return self.ledger.remaining(credential.client_id) > 0
+
+    def acquire(self):
+        """사용할 인증키 하나 반환 (쉬는 키만 남았으면 가장 빨리 풀리는 키를 기다림)"""
+        if not self.credentials:
+            raise MissingCredentials("NAVER_CLIENT_ID / NAVER_CLIENT_SECRET 이 설정되지 않았습니다.")
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                usable = [c for c in self.credentials if self._has_quota(c)]
+                if not usable:
+                    raise quota.QuotaExceeded("모든 인증키의 오늘 API 호출 한도를 사용했습니다.")
+                ready = [c for c in usable if c.cooldown_until <= now]
+                if ready:
+                    credential = self._pick(ready)
+                    credential.in_flight += 1
+                    credential.calls += 1
+                    return credential
+                wait = min(c.cooldown_until for c in usable) - now
+            time.sleep(max(wait, 0.01))
+
+    def _pick(self, ready):
+        if self.strategy == "least_used":
+            return min(ready, key=lambda c: (c.in_flight, self.ledger.used(c.client_id)))
+        # round_robin: 전체 목록 순서를 기준으로 다음 차례의 키 선택
+        count = len(self.credentials)
+        for offset in range(count):
+            credential = self.credentials[(self._next + offset) % count]
+            if credential in ready:
+                self._next = (self._next + offset + 1) % count
+                return credential
+        return ready[0]
+
+    def release(self, credential, ok=True):
+        """호출 결과 반영 (실패 시 지수적으로 늘어나는 휴식 시간 부여)"""
+        with self._lock:
+            credential.in_flight = max(0, credential.in_flight - 1)
+            if ok:
+                credential.failures = 0
+                return
+            credential.failures += 1
+            cooldown = min(CREDENTIAL_MAX_COOLDOWN, CREDENTIAL_COOLDOWN * 2 ** (credential.failures - 1))
+            credential.cooldown_until = time.monotonic() + cooldown
+
+    def remaining_quota(self):
+        """모든 인증키의 오늘 남은 호출 수 합계"""
+        return sum(self.ledger.remaining(c.client_id) for c in self.credentials)
+
+    def used_quota(self):
+        """모든 인증키의 오늘 사용한 호출 수 합계"""
+        return sum(self.ledger.used(c.client_id) for c in self.credentials)
+
+    def daily_quota(self):
+        """모든 인증키의 일일 호출 한도 합계"""
+        return self.ledger.daily_quota * len(self.credentials)
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+def get_pool():
+    """프로세스 공용 인증키 풀 반환"""
+    global _default_pool
+    if _default_pool is None:
+        with _default_lock:
+            if _default_pool is None:
+                _default_pool = CredentialPool()
+    return _default_pool
@@ -0,0 +1,238 @@
+"""
+일괄 작업 저널 (중단된 작업 이어서 실행)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+작업마다 끝난 (키워드, 판매처) 결과와 받아 온 결과 페이지를 완료 즉시 SQLite 에
+기록합니다. 같은 작업을 다시 시작하면 기록된 결과는 바로 돌려주고, 기록된
+페이지는 API 를 다시 부르지 않고 저널에서 읽어 남은 부분만 조회합니다.
+작업이 끝나면 페이지 기록은 지우고 결과만 남깁니다.
+
+작업 ID 를 직접 지정한 작업만 시간과 상관없이 이어서 실행합니다. 입력으로 만든
+자동 ID 는 검색 캐시 TTL 안에 다시 실행할 때만 이어 쓰고, 그보다 오래된 미완료
+작업은 버리고 새로 시작합니다. JOURNAL_ABANDON_SECONDS 가 지난 미완료 작업의
+페이지 기록은 정리합니다.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+import naver_api
+import rank_engine
+import shop_records
+import response_cache
+from response_cache import normalize_query
+
+JOURNAL_PATH = os.getenv("JOURNAL_PATH", "naver_jobs.db")
+# 이 시간이 지나도록 끝나지 않은 작업은 버려진 것으로 보고 페이지 기록 삭제 (초)
+JOURNAL_ABANDON_SECONDS = float(os.getenv("JOURNAL_ABANDON_SECONDS", str(24 * 60 * 60)))
+
+def make_job_id(kind, keywords, malls=(), **options):
+    """작업 종류 + 입력으로 재현 가능한 작업 ID 생성"""
+    payload = json.dumps(
+        {"kind": kind, "keywords": list(keywords), "malls": list(malls), "options": options},
+        ensure_ascii=False, sort_keys=True
+    )
+    return f"{kind}-{hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]}"
+
+class JobJournal:
+    """작업 결과/페이지 기록 저널"""
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " params TEXT NOT NULL,"
+            " started_at REAL NOT NULL,"
+            " finished_at REAL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " job_id TEXT NOT NULL,"
+            " keyword TEXT NOT NULL,"
+            " mall TEXT NOT NULL,"
+            " result TEXT,"
+            " PRIMARY KEY (job_id, keyword, mall))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " job_id TEXT NOT NULL,"
+            " keyword TEXT NOT NULL,"
+            " start INTEGER NOT NULL,"
+            " display INTEGER NOT NULL,"
+            " body BLOB NOT NULL,"
+            " PRIMARY KEY (job_id, keyword, start, display))"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def start_job(self, job_id, params=None, restart_finished=True, max_age=None):
+        """작업 시작 - 끝나지 않은 같은 작업이 있으면 이어서 실행
+
+        이미 끝난 작업은 restart_finished 가 True 이면 새로 시작하고, False 이면
+        기록된 결과를 그대로 씁니다. max_age(초)를 주면 그보다 오래전에 시작한
+        미완료 작업은 이어 쓰지 않고 새로 시작합니다. 기록을 이어서 쓰는 경우
+        True 를 반환합니다.
+        """
+        conn = self._connect()
+        self.prune()
+        row = conn.execute(
+            "SELECT started_at, finished_at FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is not None:
+            started_at, finished_at = row
+            if finished_at is not None and not restart_finished:
+                return True
+            if finished_at is None and (max_age is None or time.time() - started_at < max_age):
+                return True
+        self.discard(job_id)
+        conn.execute(
+            "INSERT INTO jobs (job_id, params, started_at) VALUES (?, ?, ?)",
+            (job_id, json.dumps(params or {}, ensure_ascii=False), time.time())
+        )
+        return False
+
+    def finish_job(self, job_id):
+        """작업 완료 표시 후 페이지 기록 정리"""
+        conn = self._connect()
+        conn.execute("UPDATE jobs SET finished_at = ? WHERE job_id = ?", (time.time(), job_id))
+        conn.execute("DELETE FROM pages WHERE job_id = ?", (job_id,))
+
+    def prune(self, abandon_seconds=JOURNAL_ABANDON_SECONDS):
+        """버려진(오래된 미완료) 작업과 작업 기록이 없는 페이지 기록 삭제"""
+        self._connect().execute(
+            "DELETE FROM pages WHERE job_id NOT IN"
+            " (SELECT job_id FROM jobs WHERE finished_at IS NULL AND started_at >= ?)",
+            (time.time() - abandon_seconds,)
+        )
+
+    def discard(self, job_id):
+        """작업 기록 전체 삭제"""
+        conn = self._connect()
+        for table in ("jobs", "results", "pages"):
+            conn.execute(f"DELETE FROM {table} WHERE job_id = ?", (job_id,))
+
+    def record_result(self, job_id, keyword, mall, result):
+        """끝난 (키워드, 판매처) 결과 기록 (결과 없음은 None)"""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO results (job_id, keyword, mall, result) VALUES (?, ?, ?, ?)",
+            (job_id, keyword, mall, json.dumps(result, ensure_ascii=False))
+        )
+
+    def finished_results(self, job_id):
+        """기록된 결과 {(키워드, 판매처): 결과}"""
+        rows = self._connect().execute(
+            "SELECT keyword, mall, result FROM results WHERE job_id = ?", (job_id,)
+        ).fetchall()
+        return {(keyword, mall): json.loads(result) for keyword, mall, result in rows}
+
+    def record_page(self, job_id, keyword, start, display, result):
+        """받아 온 결과 페이지 기록"""
+        body = zlib.compress(json.dumps(shop_records.as_dict(result), ensure_ascii=False).encode("utf-8"))
+        self._connect().execute(
+            "INSERT OR REPLACE INTO pages (job_id, keyword, start, display, body) VALUES (?, ?, ?, ?, ?)",
+            (job_id, keyword, start, display, body)
+        )
+
+    def get_page(self, job_id, keyword, start, display):
+        """기록된 결과 페이지 (없으면 None)"""
+        row = self._connect().execute(
+            "SELECT body FROM pages WHERE job_id = ? AND keyword = ? AND start = ? AND display = ?",
+            (job_id, keyword, start, display)
+        ).fetchone()
+        return shop_records.decode_page(zlib.decompress(row[0])) if row else None
+
+    def page_fetcher(self, job_id, fetch_page):
+        """저널을 먼저 보고 없을 때만 fetch_page 를 호출해 기록하는 페이지 조회 함수"""
+        def fetch(keyword, start, display=100):
+            result = self.get_page(job_id, keyword, start, display)
+            if result is None:
+                result = fetch_page(keyword, start, display)
+                self.record_page(job_id, keyword, start, display, result)
+            return result
+        return fetch
+
+def run_rank_job(keywords, mall_names, max_depth=None, concurrency=None, on_result=None,
+                 on_page=None, on_error=None, job_id=None, restart_finished=True, journal=None,
+                 deadline=None, cancel=None, scan_mode=None, collector=None):
+    """저널에 기록하며 키워드 × 판매처 순위 작업 실행
+
+    같은 작업이 중간에 멈췄다면 끝난 키워드는 기록에서 바로 돌려주고(on_result 도 호출),
+    나머지 키워드만 조회하며 이미 받은 페이지는 저널에서 읽습니다. job_id 를 주지
+    않으면 쇼핑 검색 캐시 TTL 안에 멈춘 같은 입력의 작업만 이어서 실행합니다.
+    오류나 마감/취소로 순위를 확정하지 못한 키워드는 기록하지 않아 다음 실행에서
+    다시 조회합니다. collector(near_duplicates.PageCollector)를 주면 저널에서 읽은
+    페이지까지 모두 모읍니다.
+    """
+    journal = journal or get_journal()
+    mall_names = list(dict.fromkeys(mall_names))
+    # 자동 ID 는 오래된 순위를 조용히 이어 쓰지 않도록 캐시 TTL 이 지난 기록을 버림
+    max_age = None if job_id else response_cache.endpoint_ttl("shop")
+    job_id = job_id or make_job_id("rank", keywords, mall_names, max_depth=max_depth)
+    resumed = journal.start_job(
+        job_id, {"keywords": len(keywords), "malls": mall_names, "max_depth": max_depth},
+        restart_finished, max_age
+    )
+    done = journal.finished_results(job_id) if resumed else {}
+
+    results = {}
+    remaining = []
+    for keyword in keywords:
+        if all((keyword, mall_name) in done for mall_name in mall_names):
+            results[keyword] = {mall_name: done[(keyword, mall_name)] for mall_name in mall_names}
+            if on_result:
+                on_result(keyword, results[keyword])
+        else:
+            remaining.append(keyword)
+
+    failed = set()
+
+    def record_error(keyword, e):
+        failed.add(normalize_query(keyword))
+        if on_error:
+            on_error(keyword, e)
+
+    def record_result(keyword, best):
+        if normalize_query(keyword) not in failed:
+            for mall_name, product in best.items():
+                journal.record_result(job_id, keyword, mall_name, product)
+        if on_result:
+            on_result(keyword, best)
+
+    if remaining:
+        fetch_page = journal.page_fetcher(job_id, naver_api.rank_page)
+        if collector is not None:
+            fetch_page = collector.wrap(fetch_page)
+        results.update(rank_engine.check_mall_ranks(
+            remaining, mall_names, concurrency=concurrency, on_result=record_result,
+            on_page=on_page, on_error=record_error, scan_mode=scan_mode, max_depth=max_depth,
+            fetch_page=fetch_page, deadline=deadline, cancel=cancel
+        ))
+    if not failed:
+        journal.finish_job(job_id)
+    return {keyword: results.get(keyword) for keyword in keywords}
+
+_default_journal = None
+_default_lock = threading.Lock()
+
+def get_journal():
+    """프로세스 공용 저널 반환"""
+    global _default_journal
+    if _default_journal is None:
+        with _default_lock:
+            if _default_journal is None:
+                _default_journal = JobJournal()
+    return _default_journal
@@ -0,0 +1,97 @@
+"""
+작업 실행 전 API 호출 비용 계획
+Copyright ⓒ 2025 happy. All rights reserved.
+
+캐시에 남아 있는 페이지를 제외한 예상 호출 수(페이지 × 키워드 × 버티컬)를
+계산해, 남은 일일 쿼터 안에 들어오도록 조회 깊이를 줄이거나 작업을 거절합니다.
+"""
+
+import credentials
+import naver_api
+import quota
+import rank_engine
+import response_cache
+import vertical_probe
+
+class JobPlan:
+    """작업 실행 전 비용 추정 결과"""
+
+    def __init__(self, estimated_calls, remaining, max_depth=None, requested_depth=None):
+        self.estimated_calls = estimated_calls
+        self.remaining = remaining
+        self.max_depth = max_depth
+        self.requested_depth = requested_depth
+
+    @property
+    def shrunk(self):
+        """요청한 조회 깊이보다 줄어들었는지"""
+        return self.requested_depth is not None and self.max_depth < self.requested_depth
+
+    def __repr__(self):
+        return (f"JobPlan(estimated_calls={self.estimated_calls}, remaining={self.remaining}, "
+                f"max_depth={self.max_depth}, requested_depth={self.requested_depth})")
+
+def remaining_quota(credential=None, ledger=None):
+    """남은 호출 수 (인증키를 지정하지 않으면 인증키 풀 전체 합계)
+
+    인증키가 하나도 없으면 쿼터 부족이 아니라 설정 오류(MissingCredentials)입니다.
+    """
+    if credential is None:
+        pool = credentials.get_pool()
+        if not len(pool):
+            raise credentials.MissingCredentials("NAVER_CLIENT_ID / NAVER_CLIENT_SECRET 이 설정되지 않았습니다.")
+        return pool.remaining_quota()
+    return (ledger or quota.get_ledger()).remaining(credential)
+
+def _uncached_calls(requests_):
+    """(엔드포인트, 파라미터) 목록 중 캐시에 없는 호출 수"""
+    cache = response_cache.get_cache()
+    if cache is None:
+        return len(requests_)
+    return sum(1 for endpoint, params in requests_ if not cache.is_fresh(endpoint, params))
+
+def estimate_rank_calls(keywords, max_depth):
+    """순위 조회 작업의 최대 호출 수 (키워드 × 페이지 - 캐시 적중)"""
+    requests_ = [
+        ("shop", naver_api.search_params(keyword, rank_engine.page_display(start, max_depth), start))
+        for keyword in keywords
+        for start in rank_engine.page_starts(max_depth)
+    ]
+    return _uncached_calls(requests_)
+
+def estimate_volume_calls(keywords, verticals=None, display=vertical_probe.COUNT_DISPLAY):
+    """검색수 추정 작업의 호출 수 (키워드 × 버티컬 - 캐시 적중)"""
+    verticals = verticals or naver_api.SEARCH_VERTICALS
+    requests_ = [
+        (vertical, naver_api.search_params(keyword, display))
+        for keyword in keywords
+        for vertical in verticals
+    ]
+    return _uncached_calls(requests_)
+
+def plan_rank_job(keywords, max_depth, credential=None, ledger=None):
+    """남은 쿼터 안에서 가능한 가장 깊은 조회 깊이로 순위 작업 계획
+
+    요청한 깊이를 먼저 확인하고, 모자라면 그보다 얕은 페이지 단위 깊이로 줄여 봅니다.
+    가장 얕은 깊이조차 조회할 수 없으면 QuotaExceeded 를 발생시킵니다.
+    """
+    remaining = remaining_quota(credential, ledger)
+    depth = max_depth
+    while depth >= 1:
+        estimated = estimate_rank_calls(keywords, depth)
+        if estimated <= remaining:
+            return JobPlan(estimated, remaining, depth, max_depth)
+        depth = (depth - 1) // rank_engine.PAGE_SIZE * rank_engine.PAGE_SIZE
+    raise quota.QuotaExceeded(
+        f"남은 API 호출 수({remaining:,}회)로는 {len(keywords)}개 키워드를 조회할 수 없습니다."
+    )
+
+def plan_volume_job(keywords, verticals=None, credential=None, ledger=None):
+    """검색수 추정 작업 계획 (쿼터를 넘으면 QuotaExceeded)"""
+    remaining = remaining_quota(credential, ledger)
+    estimated = estimate_volume_calls(keywords, verticals)
+    if estimated > remaining:
+        raise quota.QuotaExceeded(
+            f"예상 호출 수({estimated:,}회)가 남은 API 호출 수({remaining:,}회)를 넘습니다."
+        )
+    return JobPlan(estimated, remaining)
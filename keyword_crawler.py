@@ -0,0 +1,96 @@
+"""
+연관검색어 너비 우선 확장 (키워드 그래프 탐색)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+시드 키워드에서 시작해 연관검색어를 깊이별로 확장합니다. 같은 깊이의 키워드는
+동시에 조회하고, 방문한 키워드는 다시 확장하지 않으며, 전체 노드 수는
+node_budget 으로 제한합니다. 각 노드의 연관검색어 결과는 메모리에 보관하고
+페이지 응답은 디스크 캐시를 거치므로 다시 탐색해도 API 를 재호출하지 않습니다.
+"""
+
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import related_pipeline
+from response_cache import normalize_query
+
+CRAWL_DEPTH = int(os.getenv("CRAWL_DEPTH", "2"))
+CRAWL_NODE_BUDGET = int(os.getenv("CRAWL_NODE_BUDGET", "200"))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+# 노드 하나에서 확장할 연관검색어 수
+CRAWL_FANOUT = int(os.getenv("CRAWL_FANOUT", "10"))
+
+class KeywordCrawler:
+    """연관검색어 그래프 너비 우선 탐색기"""
+
+    def __init__(self, depth=None, node_budget=None, concurrency=None, fanout=None,
+                 pages=1, expand=None):
+        self.depth = CRAWL_DEPTH if depth is None else depth
+        self.node_budget = max(1, node_budget or CRAWL_NODE_BUDGET)
+        self.concurrency = max(1, concurrency or CRAWL_CONCURRENCY)
+        self.fanout = max(1, fanout or CRAWL_FANOUT)
+        self.pages = pages
+        self.expand = expand or self._expand
+        self._node_cache = {}
+
+    def _expand(self, keyword):
+        return related_pipeline.get_related_keyword_scores(keyword, self.pages, self.fanout)
+
+    def neighbors(self, keyword):
+        """노드의 연관검색어 [(키워드, 점수)] (노드별 결과 캐시)"""
+        key = normalize_query(keyword)
+        if key not in self._node_cache:
+            self._node_cache[key] = [(s["keyword"], s["score"]) for s in self.expand(keyword)]
+        return self._node_cache[key]
+
+    async def crawl_async(self, seed, on_node=None):
+        """시드부터 너비 우선으로 확장한 키워드 그래프 반환
+
+        반환값은 {"nodes": {키워드: 깊이}, "edges": [(출발, 도착, 가중치)]} 입니다.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        seed = normalize_query(seed)
+        nodes = {seed: 0}
+        edges = []
+        frontier = [seed]
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            async def expand(keyword):
+                async with semaphore:
+                    try:
+                        return await loop.run_in_executor(executor, self.neighbors, keyword)
+                    except Exception:
+                        # 실패한 노드는 잎 노드로 남김
+                        return []
+
+            for level in range(self.depth):
+                if not frontier:
+                    break
+                expanded = await asyncio.gather(*(expand(keyword) for keyword in frontier))
+                next_frontier = []
+                for source, related in zip(frontier, expanded):
+                    if on_node:
+                        on_node(source, related)
+                    for target, weight in related:
+                        target = normalize_query(target)
+                        if target == source:
+                            continue
+                        if target not in nodes:
+                            if len(nodes) >= self.node_budget:
+                                continue
+                            nodes[target] = level + 1
+                            next_frontier.append(target)
+                        edges.append((source, target, weight))
+                frontier = next_frontier
+        return {"nodes": nodes, "edges": edges}
+
+    def crawl(self, seed, on_node=None):
+        """crawl_async 의 동기 실행 버전"""
+        return asyncio.run(self.crawl_async(seed, on_node))
+
+def crawl_keywords(seed, depth=None, node_budget=None, concurrency=None, fanout=None, pages=1):
+    """기본 설정으로 시드 키워드의 연관검색어 그래프 탐색"""
+    crawler = KeywordCrawler(depth, node_budget, concurrency, fanout, pages)
+    return crawler.crawl(seed)
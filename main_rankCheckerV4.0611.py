@@ -6,29 +6,32 @@ Copyright ⓒ 2025 happy. All rights reserved.
 import sys
 import os
 import uuid
-import json
 import urllib.request
-import urllib.parse
-import re
-from datetime import datetime
+import queue
+import threading
 from PySide6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QLabel,
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QLineEdit, QPushButton, QTextBrowser, QTextEdit,
     QMessageBox, QSpacerItem, QSizePolicy, QProgressBar
 )
-from PySide6.QtCore import Qt, QThread, Signal, QTimer
+from PySide6.QtCore import Qt, QThreadPool, QRunnable, QTimer
 from PySide6.QtGui import QFont, QKeyEvent, QIcon
 from dotenv import load_dotenv
 
+import credentials
+import job_journal
+import job_planner
+import quota
+import rank_engine
+
 # Load environment variables
 load_dotenv()
 
-client_id = os.getenv("NAVER_CLIENT_ID")
-client_secret = os.getenv("NAVER_CLIENT_SECRET")
-naver_ad_access_license = os.getenv("NAVER_AD_ACCESS_LICENSE")
-naver_ad_secret_key = os.getenv("NAVER_AD_SECRET_KEY")
-gemini_api_key = os.getenv("GEMINI_API_KEY")
 UUID_FILE = "user_uuid.txt"
+# 동시에 조회할 키워드 수 (스레드 풀 크기)
+RANK_WORKERS = int(os.getenv("RANK_WORKERS", "4"))
+# 결과/진행률을 모아서 화면에 반영하는 주기 (ms)
+UI_FLUSH_MS = 150
 
 def get_user_id():
     if os.path.exists(UUID_FILE):
@@ -53,67 +56,52 @@ class CustomTextEdit(QTextEdit):
         else:
             super().keyPressEvent(event)
 
-class Worker(QThread):
-    result_ready = Signal(str)
-    progress_update = Signal(int, str)
-    finished_all = Signal(dict)
+class KeywordTask(QRunnable):
+    """키워드 하나의 순위 조회 (QThreadPool 에서 실행)
+
+    QRunnable 은 시그널을 보낼 수 없으므로 결과는 공용 큐에 넣고,
+    화면 쪽 타이머가 모아서 한 번에 반영합니다.
+    """
 
-    def __init__(self, keywords, mall_name):
+    def __init__(self, keyword, mall_name, max_depth, cancel, results):
         super().__init__()
-        self.keywords = keywords
+        self.keyword = keyword
         self.mall_name = mall_name
-        self.all_results = {}
-
-    def get_top_ranked_product_by_mall(self, keyword, mall_name):
-        encText = urllib.parse.quote(keyword)
-        seen_titles = set()
-        best_product = None
-        for start in range(1, 1001, 100):
-            url = f"https://openapi.naver.com/v1/search/shop.json?query={encText}&display=100&start={start}"
-            request = urllib.request.Request(url)
-            request.add_header("X-Naver-Client-Id", client_id)
-            request.add_header("X-Naver-Client-Secret", client_secret)
-            response = urllib.request.urlopen(request)
-            result = json.loads(response.read())
-            for idx, item in enumerate(result.get("items", []), start=1):
-                if item.get("mallName") and mall_name in item["mallName"]:
-                    title_clean = re.sub(r"<.*?>", "", item["title"])
-                    if title_clean in seen_titles:
-                        continue
-                    seen_titles.add(title_clean)
-                    rank = start + idx - 1
-                    product = {
-                        "rank": rank,
-                        "title": title_clean,
-                        "price": item["lprice"],
-                        "link": item["link"],
-                        "mallName": item["mallName"]
-                    }
-                    if not best_product or rank < best_product["rank"]:
-                        best_product = product
-        return best_product
+        self.max_depth = max_depth
+        self.cancel = cancel
+        self.results = results
 
     def run(self):
-        total = len(self.keywords)
-        for i, keyword in enumerate(self.keywords):
-            result = self.get_top_ranked_product_by_mall(keyword, self.mall_name)
-            if result:
-                link_html = f'<a href="{result["link"]}" style="color:blue;">{result["link"]}</a>'
-                html = (
-                    f"<b>✅ {keyword}</b><br>"
-                    f" - 순위: {result['rank']}위<br>"
-                    f" - 상품명: {result['title']}<br>"
-                    f" - 가격: {int(result['price']):,}원<br>"
-                    f" - 링크: {link_html}<br><br>"
-                )
-                self.all_results[keyword] = result
-            else:
-                html = f"<b style='color:red;'>❌ {keyword} → 검색 결과 없음</b><br><br>"
-                self.all_results[keyword] = "검색 결과 없음"
-            percent = int(((i+1)/total)*100)
-            self.result_ready.emit(html)
-            self.progress_update.emit(percent, keyword)
-        self.finished_all.emit(self.all_results)
+        result = None
+        errors = []
+        skipped = self.cancel.is_set()
+        if not skipped:
+            try:
+                # 작업 저널에 기록하며 실행 - 중간에 끊긴 같은 키워드는 받은 페이지부터 이어서 조회
+                best = job_journal.run_rank_job(
+                    [self.keyword], [self.mall_name], max_depth=self.max_depth,
+                    on_error=lambda keyword, e: errors.append(e), cancel=self.cancel
+                )[self.keyword]
+                result = (best or {}).get(self.mall_name)
+            except Exception as e:
+                errors.append(e)
+        # 오류/중지로 멈춘 키워드는 "검색 결과 없음" 과 구분
+        incomplete = not result and (bool(errors) or skipped)
+        self.results.put((self.keyword, result, incomplete))
+
+def format_result(keyword, result, incomplete=False):
+    if result:
+        link_html = f'<a href="{result["link"]}" style="color:blue;">{result["link"]}</a>'
+        return (
+            f"<b>✅ {keyword}</b><br>"
+            f" - 순위: {result['rank']}위<br>"
+            f" - 상품명: {result['title']}<br>"
+            f" - 가격: {int(result['price']):,}원<br>"
+            f" - 링크: {link_html}<br><br>"
+        )
+    if incomplete:
+        return f"<b style='color:orange;'>⚠️ {keyword} → 조회 중단 (결과 불완전)</b><br><br>"
+    return f"<b style='color:red;'>❌ {keyword} → 검색 결과 없음</b><br><br>"
 
 def resource_path(relative_path):
     """PyInstaller 환경에서도 리소스 파일 경로를 올바르게 반환"""
@@ -127,6 +115,10 @@ class RankCheckerApp(QWidget):
         self.setWindowTitle("네이버 순위 확인기 (by happy)")
         self.setWindowIcon(QIcon(resource_path("logo_inner.ico")))
         self.resize(780, 720)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, RANK_WORKERS))
+        self.results = queue.SimpleQueue()
+        self.cancel = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -156,7 +148,14 @@ class RankCheckerApp(QWidget):
         self.button_check.setFont(bold_font)
         self.button_check.clicked.connect(self.start_check)
 
-        layout.addWidget(self.button_check)
+        self.button_stop = QPushButton("중지")
+        self.button_stop.setEnabled(False)
+        self.button_stop.clicked.connect(self.stop_check)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.button_check, 3)
+        buttons.addWidget(self.button_stop, 1)
+        layout.addLayout(buttons)
         layout.addSpacerItem(QSpacerItem(0, 10, QSizePolicy.Minimum, QSizePolicy.Fixed))
 
         self.label_status = QLabel("")
@@ -179,6 +178,8 @@ class RankCheckerApp(QWidget):
         self.dot_index = 0
         self.status_timer = QTimer()
         self.status_timer.timeout.connect(self.animate_status)
+        self.flush_timer = QTimer()
+        self.flush_timer.timeout.connect(self.flush_results)
 
     def animate_status(self):
         dots = self.dots[self.dot_index]
@@ -186,7 +187,7 @@ class RankCheckerApp(QWidget):
         self.dot_index = (self.dot_index + 1) % len(self.dots)
 
     def start_check(self):
-        self.keywords = [k.strip() for k in self.input_keywords.toPlainText().split(",") if k.strip()]
+        self.keywords = rank_engine.unique_keywords(k.strip() for k in self.input_keywords.toPlainText().split(","))
         self.mall_name = self.input_mall.text().strip()
 
         if not self.keywords or not self.mall_name:
@@ -197,26 +198,78 @@ class RankCheckerApp(QWidget):
             QMessageBox.warning(self, "제한 초과", "검색어는 최대 10개까지 가능합니다.")
             return
 
+        # 남은 쿼터 안에서 조회 깊이 결정
+        try:
+            plan = job_planner.plan_rank_job(self.keywords, rank_engine.DEFAULT_MAX_DEPTH)
+        except quota.QuotaExceeded as e:
+            QMessageBox.warning(self, "쿼터 부족", str(e))
+            return
+        except credentials.MissingCredentials as e:
+            QMessageBox.warning(self, "설정 오류", str(e))
+            return
+
         self.result_display.clear()
+        if plan.shrunk:
+            self.result_display.append(
+                f"<b style='color:orange;'>⚠️ 남은 API 호출 수({plan.remaining:,}회)에 맞춰 "
+                f"조회 깊이를 상위 {plan.max_depth}위로 줄였습니다.</b><br>"
+            )
         self.progress_bar.setValue(0)
         self.label_status.setText("🔄 검색 중")
         self.dot_index = 0
         self.status_timer.start(300)
 
-        self.worker = Worker(self.keywords, self.mall_name)
-        self.worker.result_ready.connect(self.append_result)
-        self.worker.progress_update.connect(self.update_status)
-        self.worker.finished_all.connect(lambda _: self.status_timer.stop())
-        self.worker.start()
-
-    def append_result(self, html):
-        self.result_display.append(html)
-
-    def update_status(self, percent, keyword):
-        self.progress_bar.setValue(percent)
-        if percent == 100:
-            self.status_timer.stop()
-            self.label_status.setText("✅ 검색 완료")
+        # 키워드마다 하나의 작업을 스레드 풀에 넣고, 결과는 타이머로 모아서 표시
+        self.cancel = threading.Event()
+        self.total = len(self.keywords)
+        self.done = 0
+        self.all_results = {}
+        for keyword in self.keywords:
+            self.pool.start(KeywordTask(keyword, self.mall_name, plan.max_depth, self.cancel, self.results))
+        self.button_check.setEnabled(False)
+        self.button_stop.setEnabled(True)
+        self.flush_timer.start(UI_FLUSH_MS)
+
+    def stop_check(self):
+        """진행 중인 조회 중지 (대기 중인 키워드는 건너뛰고 진행 중인 요청은 바로 멈춤)"""
+        if self.cancel is not None:
+            self.cancel.set()
+            self.button_stop.setEnabled(False)
+
+    def flush_results(self):
+        """큐에 쌓인 결과를 한 번에 화면에 반영"""
+        html = []
+        while True:
+            try:
+                keyword, result, incomplete = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.done += 1
+            if result:
+                self.all_results[keyword] = result
+            else:
+                self.all_results[keyword] = "조회 중단 (결과 불완전)" if incomplete else "검색 결과 없음"
+            html.append(format_result(keyword, result, incomplete))
+        if not html:
+            return
+        self.result_display.append("".join(html))
+        self.progress_bar.setValue(int(self.done / self.total * 100))
+        if self.done >= self.total:
+            self.finish_check()
+
+    def finish_check(self):
+        self.flush_timer.stop()
+        self.status_timer.stop()
+        self.label_status.setText("⏹ 검색 중지됨" if self.cancel.is_set() else "✅ 검색 완료")
+        self.button_check.setEnabled(True)
+        self.button_stop.setEnabled(False)
+
+    def closeEvent(self, event):
+        # 창을 닫으면 진행 중인 조회를 멈추고 작업 스레드가 끝날 때까지 기다림
+        if self.cancel is not None:
+            self.cancel.set()
+        self.pool.waitForDone()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
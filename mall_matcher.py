@@ -0,0 +1,91 @@
+"""
+판매처명 다중 패턴 매칭 (Aho-Corasick)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+여러 판매처명을 하나의 오토마톤으로 미리 컴파일해 두고, 상품의 mallName 을
+한 번만 훑어서 포함된 판매처를 모두 찾습니다. 비교 전에 전각/반각(NFKC),
+대소문자, 공백을 정규화합니다.
+"""
+
+import unicodedata
+from collections import deque
+
+# mallName 매칭 결과 캐시 크기 (같은 판매처가 여러 페이지에 반복 등장)
+MATCH_CACHE_SIZE = 4096
+
+def normalize_mall_name(text):
+    """전각 문자, 대소문자, 공백을 정규화한 판매처명 반환"""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return "".join(text.split())
+
+class MallMatcher:
+    """판매처명 목록을 컴파일한 Aho-Corasick 매처"""
+
+    def __init__(self, mall_names):
+        self.mall_names = list(dict.fromkeys(mall_names))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for name in self.mall_names:
+            pattern = normalize_mall_name(name)
+            if pattern:
+                self._add_pattern(pattern, name)
+        self._build_failure_links()
+        self._cache = {}
+
+    def _add_pattern(self, pattern, name):
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = self._output[state] + (name,)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                # 실패 링크 쪽에서 끝나는 패턴도 함께 출력
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    @property
+    def targets(self):
+        """매칭 대상 판매처명 목록 (순위 엔진 공용 인터페이스)"""
+        return self.mall_names
+
+    def match_item(self, item):
+        """검색 결과 항목의 mallName 에 포함된 판매처명 집합"""
+        return self.match(item.get("mallName"))
+
+    def match(self, text):
+        """text 에 포함된 판매처명 집합 반환"""
+        if not text:
+            return frozenset()
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        found = set()
+        for ch in normalize_mall_name(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+        found = frozenset(found)
+        if len(self._cache) >= MATCH_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[text] = found
+        return found
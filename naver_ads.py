@@ -0,0 +1,144 @@
+"""
+네이버 검색광고 API keywordstool 클라이언트
+Copyright ⓒ 2025 happy. All rights reserved.
+
+hintKeywords 에 키워드를 최대 5개씩 묶어 서명된 요청 한 번으로 월간 PC/모바일
+검색수를 받아 옵니다. 결과는 키워드별로 디스크 캐시에 저장해 다음 조회에서는
+다른 묶음으로 요청하더라도 다시 호출하지 않습니다.
+NAVER_AD_BASE_URL 로 로컬 대체 서버를 지정해 테스트할 수 있습니다.
+"""
+
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+from dotenv import load_dotenv
+
+import naver_transport
+import rate_limiter
+import response_cache
+
+# Load environment variables
+load_dotenv()
+
+NAVER_AD_BASE_URL = os.getenv("NAVER_AD_BASE_URL", "https://api.naver.com")
+KEYWORDSTOOL_URI = "/keywordstool"
+# keywordstool 이 한 번에 받는 hintKeywords 최대 개수
+HINT_BATCH_SIZE = 5
+CACHE_ENDPOINT = "ads_volume"
+
+def parse_count(value):
+    """검색수 값 변환 ("< 10" 처럼 범위로 오는 값은 상한으로 처리)"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    digits = "".join(ch for ch in str(value) if ch.isdigit())
+    return int(digits) if digits else 0
+
+def keyword_key(keyword):
+    """광고 API 의 relKeyword 와 비교하기 위한 키 (공백 제거, 대문자)"""
+    return "".join(str(keyword).split()).upper()
+
+class NaverAdsClient:
+    """검색광고 API keywordstool 배치 클라이언트"""
+
+    def __init__(self, access_license=None, secret_key=None, customer_id=None,
+                 base_url=None, batch_size=HINT_BATCH_SIZE):
+        self.access_license = access_license or os.getenv("NAVER_AD_ACCESS_LICENSE")
+        secret_key = secret_key or os.getenv("NAVER_AD_SECRET_KEY") or ""
+        self.customer_id = customer_id or os.getenv("NAVER_AD_CUSTOMER_ID")
+        self.base_url = (base_url or NAVER_AD_BASE_URL).rstrip("/")
+        self.batch_size = max(1, min(batch_size, HINT_BATCH_SIZE))
+        # 서명 키 bytes 는 한 번만 만들어 모든 요청에서 재사용
+        self._secret_key_bytes = secret_key.encode("utf-8")
+
+    def is_configured(self):
+        """광고 API 키가 모두 설정되어 있는지"""
+        return bool(self.access_license and self._secret_key_bytes and self.customer_id)
+
+    def sign(self, timestamp, method, uri):
+        """X-Signature 값 생성 (timestamp.method.uri 의 HMAC-SHA256)"""
+        message = f"{timestamp}.{method}.{uri}".encode("utf-8")
+        digest = hmac.new(self._secret_key_bytes, message, hashlib.sha256).digest()
+        return base64.b64encode(digest).decode("utf-8")
+
+    def _headers(self, method, uri):
+        timestamp = str(int(time.time() * 1000))
+        return {
+            "X-Timestamp": timestamp,
+            "X-API-KEY": self.access_license,
+            "X-Customer": str(self.customer_id),
+            "X-Signature": self.sign(timestamp, method, uri),
+            "Content-Type": "application/json",
+        }
+
+    def fetch_keyword_list(self, hint_keywords):
+        """hintKeywords 묶음 하나로 keywordstool 호출 후 keywordList 반환"""
+        params = {
+            "hintKeywords": ",".join(keyword_key(k) for k in hint_keywords),
+            "showDetail": 1,
+        }
+
+        def call():
+            headers = self._headers("GET", KEYWORDSTOOL_URI)
+            return naver_transport.get_json(self.base_url + KEYWORDSTOOL_URI, params, headers)
+
+        result = rate_limiter.call_with_limit(self.customer_id, "keywordstool", call)
+        return result.get("keywordList", [])
+
+    def _cached(self, keyword):
+        cache = response_cache.get_cache()
+        if cache is None:
+            return None
+        params = {"query": keyword_key(keyword)}
+        if not cache.is_fresh(CACHE_ENDPOINT, params):
+            return None
+        cached = cache.get(CACHE_ENDPOINT, params)
+        return json.loads(cached[0]) if cached else None
+
+    def _store(self, keyword, volume):
+        cache = response_cache.get_cache()
+        if cache is not None:
+            params = {"query": keyword_key(keyword)}
+            cache.put(CACHE_ENDPOINT, params, json.dumps(volume, ensure_ascii=False).encode("utf-8"))
+
+    def get_search_volumes(self, keywords):
+        """키워드별 월간 검색수 조회 ({키워드: {monthly_pc_qc, monthly_mobile_qc, competition} 또는 None})
+
+        광고 API 가 돌려주지 않은 키워드는 None 으로 남겨 호출 측에서 추정값으로 대체합니다.
+        """
+        volumes = {}
+        missing = []
+        for keyword in dict.fromkeys(keywords):
+            cached = self._cached(keyword)
+            if cached is not None:
+                volumes[keyword] = cached
+            else:
+                missing.append(keyword)
+
+        for i in range(0, len(missing), self.batch_size):
+            batch = missing[i:i + self.batch_size]
+            rows = {keyword_key(row.get("relKeyword", "")): row for row in self.fetch_keyword_list(batch)}
+            for keyword in batch:
+                row = rows.get(keyword_key(keyword))
+                if row is None:
+                    volumes[keyword] = None
+                    continue
+                volume = {
+                    "monthly_pc_qc": parse_count(row.get("monthlyPcQcCnt")),
+                    "monthly_mobile_qc": parse_count(row.get("monthlyMobileQcCnt")),
+                    "competition": row.get("compIdx") or "-",
+                }
+                volumes[keyword] = volume
+                self._store(keyword, volume)
+        return {keyword: volumes.get(keyword) for keyword in keywords}
+
+_default_client = None
+
+def get_client():
+    """환경변수 설정으로 만든 공용 클라이언트 반환"""
+    global _default_client
+    if _default_client is None:
+        _default_client = NaverAdsClient()
+    return _default_client
@@ -0,0 +1,137 @@
+"""
+네이버 검색 API 공용 호출 모듈
+Copyright ⓒ 2025 happy. All rights reserved.
+"""
+
+import json
+
+import requests
+
+import credentials
+import naver_transport
+import quota
+import rate_limiter
+import response_cache
+import serp_archive
+import shop_records
+import singleflight
+
+SEARCH_URL = "https://openapi.naver.com/v1/search/{vertical}.json"
+SEARCH_VERTICALS = ("shop", "blog", "news", "webkr", "image")
+# 다른 인증키로 넘겨 재시도할 응답 코드 (키 오류, 속도/쿼터 초과)
+CREDENTIAL_ERROR_STATUSES = (401, 403, 429)
+
+def search_params(query, display=100, start=None):
+    """검색 API 쿼리 파라미터 구성"""
+    params = {"query": response_cache.normalize_query(query), "display": display}
+    if start is not None:
+        params["start"] = start
+    return params
+
+def fetch_search(vertical, params):
+    """캐시 없이 검색 API 를 호출해 응답 본문 bytes 반환 (인증키 순환 + 속도 제한 적용)"""
+    url = SEARCH_URL.format(vertical=vertical)
+    pool = credentials.get_pool()
+    ledger = quota.get_ledger()
+    for attempt in range(max(1, len(pool))):
+        credential = pool.acquire()
+
+        def spend():
+            # 일일 쿼터 확인 후 실제로 나가는 호출만 장부에 기록
+            ledger.check(credential.client_id)
+            ledger.record(credential.client_id, vertical)
+
+        def hedge():
+            # p95 보다 느린 요청에 보내는 중복 요청은 쿼터가 남아 있고 같은 버킷의 토큰을
+            # 바로 받을 수 있을 때만 보냄 - 쿼터를 먼저 확인해 보내지 않을 요청에 토큰을 쓰지 않음
+            # (중복 요청은 선택 사항이므로 쿼터 초과는 원래 요청을 막지 않고 중복만 건너뜀)
+            if ledger.remaining(credential.client_id) < 1:
+                return False
+            if not rate_limiter.get_bucket(credential.client_id, vertical).try_acquire():
+                return False
+            ledger.record(credential.client_id, vertical)
+            return True
+
+        def call():
+            spend()
+            return naver_transport.get(url, params, credential.headers(), hedge=True, on_hedge=hedge).content
+
+        try:
+            body = rate_limiter.call_with_limit(credential.client_id, vertical, call)
+        except quota.QuotaExceeded:
+            pool.release(credential, ok=True)
+            if attempt == len(pool) - 1:
+                raise
+            continue
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status not in CREDENTIAL_ERROR_STATUSES:
+                pool.release(credential, ok=True)
+                raise
+            # 키 문제로 보고 잠시 쉬게 한 뒤 다른 키로 재시도
+            pool.release(credential, ok=False)
+            if attempt == len(pool) - 1:
+                raise
+            continue
+        except Exception:
+            pool.release(credential, ok=True)
+            raise
+        pool.release(credential, ok=True)
+        return body
+
+def fetch_and_archive(vertical, params):
+    """fetch_search 후 쇼핑 결과 페이지는 스냅숏 보관소에도 기록 (보관소가 켜진 경우)"""
+    body = fetch_search(vertical, params)
+    archive = serp_archive.get_archive()
+    if archive is not None and vertical == "shop":
+        try:
+            archive.add_body(params["query"], params.get("start", 1), body)
+        except Exception:
+            # 보관 실패가 조회를 막지 않도록 무시
+            pass
+    return body
+
+def search_raw(vertical, query, display=100, start=None, ttl=None, stale=True):
+    """디스크 캐시를 거쳐 검색 API 응답 본문 bytes 반환
+
+    stale=False 이면 TTL 이 지난 캐시 값을 쓰지 않고, ttl=0 이면 항상 새로 받습니다.
+    """
+    params = search_params(query, display, start)
+    return response_cache.cached_fetch(
+        vertical, params, lambda: fetch_and_archive(vertical, params), ttl, stale
+    )
+
+def search(vertical, query, display=100, start=None):
+    """네이버 검색 API 호출 (shop/blog/news/webkr/image) 후 JSON 결과 반환
+
+    같은 요청이 동시에 들어오면 하나의 호출과 파싱 결과를 함께 사용하므로
+    반환된 dict 는 수정하지 말아야 합니다.
+    """
+    key = response_cache.make_cache_key(vertical, search_params(query, display, start))
+    return singleflight.do(key, lambda: json.loads(search_raw(vertical, query, display, start)))
+
+def search_shop_page(keyword, start, display=100, ttl=None, stale=True):
+    """네이버 쇼핑 검색 결과 한 페이지 조회
+
+    응답 bytes 에서 순위 계산에 쓰는 필드만 뽑은 ShopPage 를 반환합니다
+    (get()/[] 로 dict 처럼 읽을 수 있으며 수정하지 말아야 합니다).
+    ttl/stale 은 search_raw 와 같습니다.
+    """
+    key = response_cache.make_cache_key("shop", search_params(keyword, display, start))
+    # 캐시 사용 방식이 다른 호출끼리는 결과를 나눠 쓰지 않음
+    suffix = "#records" if stale and ttl is None else f"#records-{ttl}-{int(stale)}"
+    return singleflight.do(
+        key + suffix,
+        lambda: shop_records.decode_page(search_raw("shop", keyword, display, start, ttl, stale))
+    )
+
+def rank_page(keyword, start, display=100):
+    """순위 조회용 쇼핑 결과 페이지 - TTL 이 지난 캐시 값은 쓰지 않음
+
+    결과에 조회 시각을 찍으므로 stale 페이지를 섞지 않도록 TTL 안의 캐시만 씁니다.
+    """
+    return search_shop_page(keyword, start, display, stale=False)
+
+def fresh_shop_page(keyword, start, display=100):
+    """캐시를 읽지 않고 항상 API 에서 받은 쇼핑 결과 페이지 (받은 값은 캐시에 저장)"""
+    return search_shop_page(keyword, start, display, ttl=0)
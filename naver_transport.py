@@ -0,0 +1,164 @@
+"""
+공용 HTTP 전송 계층 (커넥션 풀 + keep-alive + gzip)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+프로세스 전체에서 requests.Session 하나를 공유해 TLS 연결을 재사용합니다.
+호스트별 커넥션 수는 HTTP_POOL_PER_HOST 로 제한하고, 풀이 가득 차면
+새 연결을 만들지 않고 반납을 기다립니다.
+
+연결 시간 제한(HTTP_CONNECT_TIMEOUT)과 응답 시간 제한(HTTP_TIMEOUT)을 나눠
+두고, hedge=True 로 호출하면 최근 응답 시간의 p95 를 넘긴 요청에 같은 요청을
+한 번 더 보내 먼저 온 응답을 씁니다. 중복 요청은 전체의 HTTP_HEDGE_MAX_RATIO
+이하로 제한합니다.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "4"))
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "16"))
+
+# 느린 요청 중복 전송 (0 이면 끔), 최소 표본 수와 전체 요청 대비 상한 비율
+HTTP_HEDGE = os.getenv("HTTP_HEDGE", "1") != "0"
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MAX_RATIO = float(os.getenv("HTTP_HEDGE_MAX_RATIO", "0.05"))
+LATENCY_WINDOW = 200
+
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+_session = None
+_session_lock = threading.Lock()
+_hedge_executor = None
+
+class LatencyTracker:
+    """최근 성공 응답 시간과 중복 요청 비율 기록"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._requests = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def count_request(self):
+        with self._lock:
+            self._requests += 1
+
+    def p95(self):
+        """최근 응답 시간 p95 (표본이 HEDGE_MIN_SAMPLES 보다 적으면 None)"""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            samples = sorted(self._samples)
+        return samples[int(0.95 * (len(samples) - 1))]
+
+    def try_hedge(self):
+        """중복 요청 비율 상한 안이면 한 건 예약하고 True"""
+        with self._lock:
+            if self._hedges + 1 > HEDGE_MAX_RATIO * self._requests:
+                return False
+            self._hedges += 1
+            return True
+
+latency = LatencyTracker()
+
+def get_session():
+    """프로세스 공용 Session 반환 (최초 호출 시 생성)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_HOSTS,
+                    pool_maxsize=HTTP_POOL_PER_HOST,
+                    pool_block=True
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(DEFAULT_HEADERS)
+                _session = session
+    return _session
+
+def close_session():
+    """공용 Session 과 풀의 연결을 모두 닫음"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def get_hedge_executor():
+    """중복 요청용 공용 스레드 풀 (최초 호출 시 생성)"""
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _session_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=HTTP_POOL_PER_HOST * 4, thread_name_prefix="http-hedge"
+                )
+    return _hedge_executor
+
+def _timed_get(url, params, headers, timeout):
+    started = time.monotonic()
+    response = get_session().get(
+        url, params=params, headers=headers, timeout=timeout or (HTTP_CONNECT_TIMEOUT, HTTP_TIMEOUT)
+    )
+    response.raise_for_status()
+    latency.observe(time.monotonic() - started)
+    return response
+
+def get(url, params=None, headers=None, timeout=None, hedge=False, on_hedge=None):
+    """공용 Session 으로 GET 요청 (HTTP 오류 상태는 예외 발생)
+
+    hedge=True 이면 응답이 최근 p95 보다 늦을 때 같은 요청을 한 번 더 보내고
+    먼저 성공한 응답을 반환합니다. on_hedge 는 중복 요청을 보내기 직전에
+    호출되며 False 를 돌려주거나 예외를 내면 중복 요청 없이 원래 요청만 기다립니다.
+    """
+    latency.count_request()
+    delay = latency.p95() if hedge and HTTP_HEDGE else None
+    if delay is None:
+        return _timed_get(url, params, headers, timeout)
+
+    executor = get_hedge_executor()
+    primary = executor.submit(_timed_get, url, params, headers, timeout)
+    try:
+        return primary.result(timeout=delay)
+    except FutureTimeout:
+        pass
+    if not latency.try_hedge():
+        return primary.result()
+    try:
+        if on_hedge is not None and not on_hedge():
+            return primary.result()
+    except Exception:
+        return primary.result()
+
+    pending = {primary, executor.submit(_timed_get, url, params, headers, timeout)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                return future.result()
+            except Exception as e:
+                error = e
+    raise error
+
+def get_json(url, params=None, headers=None, timeout=None):
+    """GET 요청 후 JSON 본문 반환 (gzip 응답은 자동 해제)"""
+    return get(url, params=params, headers=headers, timeout=timeout).json()
@@ -0,0 +1,190 @@
+"""
+유사 상품 묶기 (MinHash + LSH 근사 중복 검출)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+같은 판매처가 제목만 조금 바꿔 여러 번 올린 상품은 제목 완전 일치로는 걸러지지
+않아 "상위 1000위 안에 판매처 X 가 몇 자리를 차지하나" 가 부풀려집니다.
+정리한 제목을 글자 n-gram 으로 나눠 MinHash 서명을 만들고, 서명을 띠(band)로
+잘라 같은 버킷에 들어온 상품끼리만 비교(LSH)해 비슷한 상품을 묶습니다.
+모든 쌍을 비교하지 않으므로 상품 수에 거의 비례하는 시간에 끝납니다.
+
+페이지는 따로 받지 않고, 순위 조회(full 방식)가 받은 페이지를 PageCollector 로
+모아 묶습니다.
+"""
+
+import os
+import re
+import zlib
+import threading
+import unicodedata
+
+import numpy as np
+
+import rank_engine
+from mall_matcher import MallMatcher
+from response_cache import normalize_query
+
+SHINGLE_SIZE = int(os.getenv("NEAR_DUP_SHINGLE", "3"))
+MINHASH_PERMUTATIONS = int(os.getenv("NEAR_DUP_PERMUTATIONS", "64"))
+LSH_BANDS = int(os.getenv("NEAR_DUP_BANDS", "16"))
+# 같은 버킷에 들어와도 추정 유사도(서명 일치 비율)가 이보다 낮으면 묶지 않음
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+HASH_SEED = 20250611
+
+TAG_RE = re.compile(r"<.*?>")
+
+def clean_title(title):
+    """태그 제거 + 전각/대소문자/공백 정규화한 상품명"""
+    if "<" in title:
+        title = TAG_RE.sub("", title)
+    return "".join(unicodedata.normalize("NFKC", title).casefold().split())
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """글자 n-gram 의 32비트 해시 배열 (중복 제거)"""
+    encoded = [text[i:i + size] for i in range(max(1, len(text) - size + 1))]
+    return np.unique(np.fromiter((zlib.crc32(s.encode("utf-8")) for s in encoded),
+                                 dtype="uint64", count=len(encoded)))
+
+def permutations(num_perm=MINHASH_PERMUTATIONS):
+    """MinHash 순열 계수 (a, b) - 실행마다 같은 서명이 나오도록 고정 시드"""
+    rng = np.random.default_rng(HASH_SEED)
+    a = rng.integers(0, 2 ** 63, size=num_perm, dtype="uint64") * 2 + 1
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype="uint64")
+    return a, b
+
+def minhash_signatures(titles, num_perm=MINHASH_PERMUTATIONS):
+    """정리한 제목 목록의 MinHash 서명 (상품 수 × num_perm)"""
+    if not titles:
+        return np.zeros((0, num_perm), dtype="uint64")
+    shingles = [shingle_hashes(title) for title in titles]
+    lengths = np.fromiter((len(s) for s in shingles), dtype="int64", count=len(shingles))
+    flat = np.concatenate(shingles)
+    a, b = permutations(num_perm)
+    # 모든 n-gram 에 모든 순열을 한 번에 적용한 뒤 상품 구간별 최솟값
+    # (곱셈-덧셈-상위 비트 해시: uint64 에서 넘치는 부분은 버리고 상위 32비트 사용)
+    with np.errstate(over="ignore"):
+        values = (a[:, None] * flat[None, :] + b[:, None]) >> np.uint64(32)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    return np.minimum.reduceat(values, offsets, axis=1).T
+
+def lsh_clusters(signatures, bands=LSH_BANDS, threshold=NEAR_DUP_THRESHOLD):
+    """서명을 띠별 버킷으로 나눠 비슷한 상품끼리 묶은 군집 번호 배열
+
+    버킷마다 처음 들어온 상품을 기준으로 나머지를 한 번씩만 비교하므로
+    비교 횟수는 상품 수 × 띠 수입니다. 군집 번호는 군집에서 가장 앞 상품의 위치입니다.
+    """
+    count, num_perm = signatures.shape
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = max(1, num_perm // bands)
+    for band in range(0, num_perm - rows + 1, rows):
+        chunk = np.ascontiguousarray(signatures[:, band:band + rows])
+        keys = chunk.view(np.dtype((np.void, chunk.dtype.itemsize * rows))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        anchors = first[inverse.ravel()]
+        similarity = (signatures == signatures[anchors]).mean(axis=1)
+        for i in np.flatnonzero((anchors != np.arange(count)) & (similarity >= threshold)):
+            root_a, root_b = find(int(anchors[i])), find(int(i))
+            # 군집 대표(가장 앞 순위)끼리도 비슷할 때만 합쳐 조금씩 다른 상품이 사슬처럼 이어지지 않게 함
+            if root_a != root_b and (signatures[root_a] == signatures[root_b]).mean() >= threshold:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+    return np.fromiter((find(i) for i in range(count)), dtype="int64", count=count)
+
+def group_items(items, start=1):
+    """순위순 검색 결과 항목을 유사 상품 군집으로 묶음
+
+    반환값은 최고 순위순 군집 목록이며 각 군집은
+    {"rank": 최고 순위, "title": 대표 상품명, "size": 상품 수, "ranks": [...], "malls": [...]} 입니다.
+    """
+    titles = [clean_title(item.get("title", "")) for item in items]
+    labels = lsh_clusters(minhash_signatures(titles))
+    clusters = {}
+    for offset, (item, label) in enumerate(zip(items, labels)):
+        rank = start + offset
+        if not titles[offset]:
+            # 빈 제목은 모두 같은 서명이 되므로 비교하지 않고 상품 자체(productId/link)로 묶음
+            label = ("item", item.get("productId") or item.get("link") or offset)
+        cluster = clusters.get(label)
+        if cluster is None:
+            cluster = clusters[label] = {
+                "rank": rank, "title": TAG_RE.sub("", item.get("title", "")),
+                "size": 0, "ranks": [], "malls": []
+            }
+        cluster["size"] += 1
+        cluster["ranks"].append(rank)
+        cluster["malls"].append(item.get("mallName"))
+    return sorted(clusters.values(), key=lambda c: c["rank"])
+
+def mall_slots(clusters, mall_name, top_n=None):
+    """판매처가 차지한 자리 수 - 상품 수와 유사 상품을 하나로 친 군집 수"""
+    matcher = MallMatcher([mall_name])
+    items = 0
+    groups = 0
+    for cluster in clusters:
+        hits = sum(1 for rank, mall in zip(cluster["ranks"], cluster["malls"])
+                   if (top_n is None or rank <= top_n) and matcher.match(mall))
+        items += hits
+        groups += 1 if hits else 0
+    return {"items": items, "groups": groups}
+
+class PageCollector:
+    """순위 조회가 받은 결과 페이지를 모아 유사 상품 자리 수를 계산
+
+    wrap() 으로 감싼 fetch_page 를 full 방식 순위 조회에 넘기면 조회가 받은
+    페이지를 그대로 모으므로 유사 상품을 묶으려고 페이지를 다시 받지 않습니다.
+    """
+
+    def __init__(self):
+        self._pages = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, fetch_page):
+        """받은 페이지를 모으는 fetch_page 래퍼"""
+        def fetch(keyword, start, display=rank_engine.PAGE_SIZE):
+            result = fetch_page(keyword, start, display)
+            with self._lock:
+                self._pages[(normalize_query(keyword), start)] = result
+            return result
+        return fetch
+
+    def items(self, keyword):
+        """모은 페이지의 순위순 항목 (중간 페이지가 빠지면 그 앞까지만)"""
+        key = normalize_query(keyword)
+        items = []
+        start = 1
+        with self._lock:
+            while (key, start) in self._pages:
+                page_items = self._pages[(key, start)].get("items", [])
+                items.extend(page_items)
+                if len(page_items) < rank_engine.PAGE_SIZE:
+                    break
+                start += rank_engine.PAGE_SIZE
+        return items
+
+    def slots(self, keyword, mall_names):
+        """판매처별 자리 수 {판매처: {"items", "groups", "depth"}} (페이지가 없으면 None)
+
+        처음 계산할 때 키워드의 페이지를 버리고 결과만 남깁니다.
+        depth 는 자리 수를 센 순위 범위(받은 상품 수)입니다.
+        """
+        key = normalize_query(keyword)
+        if key not in self._slots:
+            items = self.items(key)
+            if not items:
+                return None
+            clusters = group_items(items)
+            self._slots[key] = {
+                mall_name: dict(mall_slots(clusters, mall_name), depth=len(items))
+                for mall_name in mall_names
+            }
+            with self._lock:
+                for page_key in [k for k in self._pages if k[0] == key]:
+                    del self._pages[page_key]
+        return self._slots[key]
@@ -0,0 +1,63 @@
+"""
+상품 ID 기반 추적 색인
+Copyright ⓒ 2025 happy. All rights reserved.
+
+제목은 판매자가 바꾸거나 다른 상품과 겹칠 수 있으므로, 쇼핑 결과의 고정
+식별자(productId, 없으면 link)로 상품을 추적합니다. 추적 중인 상품 ID 에서
+감시자 목록으로 가는 dict 를 하나 두고, 결과 페이지의 상품마다 dict 조회 한
+번으로 추적 대상인지 확인하므로 한 번 훑어서 모든 추적 상품의 순위가 나옵니다.
+
+MallMatcher 와 같은 targets / match_item 인터페이스라 순위 엔진이 그대로 씁니다.
+"""
+
+def product_key(value):
+    """추적 키 정규화 (productId 는 숫자 문자열, 그 외는 상품 링크)"""
+    return str(value).strip()
+
+class ProductIndex:
+    """추적 상품 ID → 감시자 색인"""
+
+    def __init__(self, watches=()):
+        self._watchers = {}
+        self._has_links = False
+        if isinstance(watches, dict):
+            for key, watchers in watches.items():
+                self.add(key)
+                for watcher in watchers:
+                    self.add(key, watcher)
+        else:
+            for key in watches:
+                self.add(key)
+
+    def add(self, key, watcher=None):
+        """추적 상품 추가 (watcher 는 결과를 받을 대상 이름 등)"""
+        key = product_key(key)
+        watchers = self._watchers.setdefault(key, [])
+        if watcher is not None and watcher not in watchers:
+            watchers.append(watcher)
+        if not key.isdigit():
+            self._has_links = True
+
+    @property
+    def targets(self):
+        """추적 중인 상품 키 목록"""
+        return list(self._watchers)
+
+    def watchers(self, key):
+        """상품을 지켜보는 감시자 목록"""
+        return self._watchers.get(product_key(key), [])
+
+    def match_item(self, item):
+        """결과 항목이 추적 상품이면 그 키를 담은 튜플, 아니면 빈 튜플
+
+        검색 API 의 productId 는 문자열이라 dict 조회 한 번으로 끝나고,
+        링크로 등록한 상품이 있을 때만 link 를 한 번 더 봅니다.
+        """
+        key = item.get("productId")
+        if key in self._watchers:
+            return (key,)
+        if self._has_links:
+            link = item.get("link")
+            if link in self._watchers:
+                return (link,)
+        return ()
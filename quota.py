@@ -0,0 +1,93 @@
+"""
+네이버 검색 API 일일 호출량 장부
+Copyright ⓒ 2025 happy. All rights reserved.
+
+실제로 나간 호출을 (날짜, 인증키, 엔드포인트) 별로 SQLite 에 기록합니다.
+날짜는 네이버 쿼터 초기화 기준인 한국 시간(KST)으로 계산합니다.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+NAVER_DAILY_QUOTA = int(os.getenv("NAVER_DAILY_QUOTA", "25000"))
+QUOTA_PATH = os.getenv("QUOTA_PATH", "naver_quota.db")
+
+KST = timezone(timedelta(hours=9))
+
+class QuotaExceeded(Exception):
+    """일일 호출 한도를 넘는 요청/작업"""
+
+def today():
+    """쿼터 기준 날짜 (KST, YYYY-MM-DD)"""
+    return datetime.now(KST).strftime("%Y-%m-%d")
+
+class QuotaLedger:
+    """인증키/날짜별 API 호출 수 장부"""
+
+    def __init__(self, path=QUOTA_PATH, daily_quota=NAVER_DAILY_QUOTA):
+        self.path = path
+        self.daily_quota = daily_quota
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            " day TEXT NOT NULL,"
+            " credential TEXT NOT NULL,"
+            " endpoint TEXT NOT NULL,"
+            " calls INTEGER NOT NULL,"
+            " PRIMARY KEY (day, credential, endpoint))"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def record(self, credential, endpoint, calls=1, day=None):
+        """호출 수 기록"""
+        self._connect().execute(
+            "INSERT INTO usage (day, credential, endpoint, calls) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(day, credential, endpoint) DO UPDATE SET calls = calls + excluded.calls",
+            (day or today(), credential or "", endpoint, calls)
+        )
+
+    def used(self, credential, day=None):
+        """해당 날짜에 인증키가 사용한 호출 수"""
+        row = self._connect().execute(
+            "SELECT COALESCE(SUM(calls), 0) FROM usage WHERE day = ? AND credential = ?",
+            (day or today(), credential or "")
+        ).fetchone()
+        return row[0]
+
+    def usage_by_endpoint(self, credential, day=None):
+        """엔드포인트별 사용량 {엔드포인트: 호출 수}"""
+        rows = self._connect().execute(
+            "SELECT endpoint, calls FROM usage WHERE day = ? AND credential = ?",
+            (day or today(), credential or "")
+        ).fetchall()
+        return dict(rows)
+
+    def remaining(self, credential, day=None):
+        """오늘 남은 호출 수"""
+        return max(0, self.daily_quota - self.used(credential, day))
+
+    def check(self, credential, calls=1):
+        """호출 전 한도 확인 (초과 시 QuotaExceeded)"""
+        if self.remaining(credential) < calls:
+            raise QuotaExceeded(f"오늘 API 호출 한도({self.daily_quota:,}회)를 모두 사용했습니다.")
+
+_default_ledger = None
+_default_lock = threading.Lock()
+
+def get_ledger():
+    """프로세스 공용 장부 반환"""
+    global _default_ledger
+    if _default_ledger is None:
+        with _default_lock:
+            if _default_ledger is None:
+                _default_ledger = QuotaLedger()
+    return _default_ledger
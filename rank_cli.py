@@ -0,0 +1,225 @@
+"""
+네이버 순위 확인기 - 명령줄 일괄 실행기
+Copyright ⓒ 2025 happy. All rights reserved.
+
+화면 없는 서버에서 CSV 파일이나 표준 입력으로 키워드를 받아 순위/검색수를
+조회하고, 결과가 나오는 즉시 한 줄씩 JSONL 로 출력합니다. 입력은 CHUNK_SIZE
+단위로 나눠 읽으므로 10만 개 이상의 키워드도 메모리 사용량이 일정합니다.
+
+사용 예:
+    python rank_cli.py rank keywords.csv --mall OO스토어 > ranks.jsonl
+    cat keywords.txt | python rank_cli.py volume - > volumes.jsonl
+
+CSV 는 첫 열이 키워드이며, 두 번째 열(mall)에 ';' 로 구분한 판매처를 적으면
+해당 행은 그 판매처만 조회합니다. 첫 행이 keyword 로 시작하면 머리글로 봅니다.
+"""
+
+import sys
+import csv
+import json
+import time
+import argparse
+from datetime import datetime
+from itertools import islice
+
+import credentials
+import job_journal
+import job_planner
+import naver_ads
+import naver_api
+import near_duplicates
+import quota
+import rank_engine
+import vertical_probe
+import volume_estimator
+from response_cache import normalize_query
+
+CHUNK_SIZE = 200
+
+def read_rows(stream, default_malls=()):
+    """입력 CSV 를 (키워드, 판매처 목록) 으로 한 줄씩 읽기"""
+    for i, row in enumerate(csv.reader(stream)):
+        if not row or not row[0].strip():
+            continue
+        if i == 0 and row[0].strip().lower() == "keyword":
+            continue
+        keyword = row[0].strip()
+        malls = [m.strip() for m in row[1].split(";") if m.strip()] if len(row) > 1 else []
+        yield keyword, malls or list(default_malls)
+
+def chunks(iterable, size=CHUNK_SIZE):
+    """iterable 을 size 개씩 나눠 list 로 반환"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def write_line(output, record):
+    """JSONL 한 줄 출력 후 바로 flush"""
+    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    output.flush()
+
+def positive_int(value):
+    """1 이상의 정수만 받는 argparse 형식"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"정수가 아닙니다: {value}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1 이상이어야 합니다: {value}")
+    return number
+
+def now_iso():
+    return datetime.now().isoformat(timespec="seconds")
+
+def rank_record(keyword, mall_name, product, incomplete=False, slots=None):
+    """순위 결과 JSONL 레코드
+
+    incomplete 는 조회가 중간에 멈춰 순위를 확정하지 못한 경우, slots 는 --slots 로
+    센 판매처 자리 수 {"items", "groups", "depth"} 입니다.
+    """
+    record = {"keyword": keyword, "mall": mall_name, "rank": None, "checked_at": now_iso()}
+    if product:
+        record.update(product)
+    elif incomplete:
+        record["incomplete"] = True
+    if slots is not None:
+        record["slots"] = slots
+    return record
+
+def run_rank(args, output):
+    """rank 명령 - 키워드 × 판매처 최고 순위"""
+    # --deadline 은 명령 전체 제한 시간이므로 묶음마다 남은 시간만 넘김
+    expires = time.monotonic() + args.deadline if args.deadline else None
+    for chunk_index, chunk in enumerate(chunks(read_rows(args.input, args.mall), args.chunk_size)):
+        malls_by_keyword = {}
+        for keyword, malls in chunk:
+            if not malls:
+                print(f"판매처가 없는 키워드 건너뜀: {keyword}", file=sys.stderr)
+                continue
+            malls_by_keyword.setdefault(keyword, []).extend(malls)
+        if not malls_by_keyword:
+            continue
+        keywords = list(malls_by_keyword)
+        all_malls = list(dict.fromkeys(m for malls in malls_by_keyword.values() for m in malls))
+
+        plan = job_planner.plan_rank_job(keywords, args.depth)
+        if plan.shrunk:
+            print(f"남은 쿼터({plan.remaining:,}회)에 맞춰 조회 깊이를 {plan.max_depth}위로 줄였습니다.",
+                  file=sys.stderr)
+
+        failed = set()
+        deadline = max(expires - time.monotonic(), 0.001) if expires else None
+        # --slots 는 모든 페이지를 받아(full) 조회가 받은 페이지로 유사 상품을 묶음
+        collector = near_duplicates.PageCollector() if args.slots else None
+        scan_mode = "full" if args.slots else None
+
+        def on_result(keyword, best):
+            slots = collector.slots(keyword, all_malls) if collector else None
+            for mall_name in dict.fromkeys(malls_by_keyword[keyword]):
+                write_line(output, rank_record(keyword, mall_name, best.get(mall_name),
+                                               normalize_query(keyword) in failed,
+                                               (slots or {}).get(mall_name)))
+
+        def on_error(keyword, e):
+            failed.add(normalize_query(keyword))
+            print(f"API 요청 오류 ({keyword}): {e}", file=sys.stderr)
+
+        # 한 번의 페이지 조회로 이 묶음의 모든 판매처 순위를 계산
+        if args.job_id:
+            # 묶음별 저널 - 다시 실행하면 끝난 묶음은 기록에서 출력하고 남은 부분만 조회
+            job_journal.run_rank_job(
+                keywords, all_malls, max_depth=plan.max_depth, concurrency=args.concurrency,
+                on_result=on_result, on_error=on_error,
+                job_id=f"{args.job_id}-{chunk_index}", restart_finished=False, deadline=deadline,
+                scan_mode=scan_mode, collector=collector
+            )
+        else:
+            fetch_page = collector.wrap(naver_api.rank_page) if collector else None
+            rank_engine.check_mall_ranks(
+                keywords, all_malls, concurrency=args.concurrency, on_result=on_result,
+                on_error=on_error, scan_mode=scan_mode, max_depth=plan.max_depth,
+                fetch_page=fetch_page, deadline=deadline
+            )
+
+def run_volume(args, output):
+    """volume 명령 - 광고 API 우선, 누락 키워드는 검색 API 추정"""
+    client = naver_ads.get_client()
+    for chunk in chunks(read_rows(args.input), args.chunk_size):
+        keywords = rank_engine.unique_keywords(keyword for keyword, _ in chunk)
+        volumes = {}
+        if client.is_configured() and not args.estimate_only:
+            try:
+                volumes = client.get_search_volumes(keywords)
+            except Exception as e:
+                print(f"광고 API 조회 실패, 추정으로 대체: {e}", file=sys.stderr)
+        for keyword in keywords:
+            volume = volumes.get(keyword)
+            if volume:
+                write_line(output, dict(keyword=keyword, source="ads", checked_at=now_iso(), **volume))
+
+        fallback = [k for k in keywords if not volumes.get(k)]
+        if not fallback:
+            continue
+        job_planner.plan_volume_job(fallback)
+        all_totals = vertical_probe.probe_counts(fallback, concurrency=args.concurrency)
+        estimates = volume_estimator.estimate_volumes(volume_estimator.totals_frame(all_totals))
+        for result in volume_estimator.to_results(estimates):
+            result.update(source="estimate", checked_at=now_iso())
+            write_line(output, result)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="네이버 순위 확인기 - 명령줄 일괄 실행기")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub):
+        sub.add_argument("input", type=argparse.FileType("r", encoding="utf-8-sig"),
+                         help="키워드 CSV 파일 경로 ('-' 는 표준 입력)")
+        sub.add_argument("-o", "--output", type=argparse.FileType("w", encoding="utf-8"),
+                         default=sys.stdout, help="JSONL 출력 파일 (기본: 표준 출력)")
+        sub.add_argument("--concurrency", type=positive_int, default=None, help="동시 요청 수")
+        sub.add_argument("--chunk-size", type=positive_int, default=CHUNK_SIZE,
+                         help="한 번에 읽어 처리할 키워드 수")
+
+    rank = subparsers.add_parser("rank", help="판매처 최고 순위 조회")
+    add_common(rank)
+    rank.add_argument("--mall", action="append", default=[],
+                      help="조회할 판매처명 (여러 번 지정 가능, CSV 의 mall 열이 우선)")
+    rank.add_argument("--depth", type=positive_int, default=rank_engine.DEFAULT_MAX_DEPTH,
+                      help="조회 깊이 (상위 N위까지)")
+    rank.add_argument("--job-id", "--resume", dest="job_id", default=None,
+                      help="작업 이름 - 지정하면 진행 상황을 저널에 기록하고, 같은 이름으로 "
+                           "다시 실행하면 중단된 지점부터 이어서 실행")
+    rank.add_argument("--slots", action="store_true",
+                      help="조회 깊이까지 모든 페이지를 받아 판매처가 차지한 자리 수(상품 수와 "
+                           "유사 상품 묶음 수)를 slots 열로 함께 출력")
+    rank.add_argument("--deadline", type=float, default=rank_engine.DEFAULT_DEADLINE,
+                      help="전체 제한 시간 (초) - 넘기면 확정하지 못한 순위는 incomplete 로 출력")
+
+    volume = subparsers.add_parser("volume", help="월간 검색수 조회")
+    add_common(volume)
+    volume.add_argument("--estimate-only", action="store_true",
+                        help="광고 API 를 쓰지 않고 검색 API 추정만 사용")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "rank":
+            run_rank(args, args.output)
+        else:
+            run_volume(args, args.output)
+    except quota.QuotaExceeded as e:
+        print(f"쿼터 부족으로 중단: {e}", file=sys.stderr)
+        return 2
+    except credentials.MissingCredentials as e:
+        print(f"설정 오류: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
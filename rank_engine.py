@@ -0,0 +1,464 @@
+"""
+네이버 쇼핑 순위 조회 엔진 (asyncio 동시 요청)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+모든 (키워드, start) 페이지 요청을 하나의 이벤트 루프에서 동시 실행하고,
+동시 요청 수는 세마포어로 제한합니다. 페이지 결과는 키워드별로 다시 모아
+기존 get_top_ranked_product_by_mall 과 같은 최고 순위 상품 하나로 병합합니다.
+
+페이지는 순위 순서로 내려오므로 처음 일치한 상품이 곧 최고 순위입니다.
+기본 조회 방식(first_hit)은 최고 순위가 확정되는 즉시 남은 페이지 요청을
+취소하고, full 방식은 조회 깊이까지 모든 페이지를 받습니다.
+
+여러 판매처를 추적할 때도 키워드의 결과 페이지는 한 번만 훑고, 각 상품의
+mallName 은 MallMatcher 오토마톤 하나로 모든 판매처와 동시에 비교합니다.
+특정 상품(SKU)은 제목이 아니라 productId 로 추적하며, ProductIndex 의 dict 조회
+한 번으로 상품마다 추적 대상인지 확인해 추적 상품별 순위를 함께 구합니다.
+
+이전 순위(hints)를 아는 경우 probe 방식은 그 순위가 있던 페이지부터 받아
+바깥쪽으로 넓혀 가며, 앞 페이지가 모두 확인되어 최고 순위가 증명되는 즉시
+멈춥니다. stable 방식은 이전 순위 근처(RANK_PROBE_RADIUS 페이지 이내)에서
+찾으면 앞 페이지 확인 없이 바로 받아들이고 verified=False 로 표시합니다.
+
+deadline(초)을 주면 작업 전체가 그 시간 안에 끝나야 하고, cancel(threading.Event)
+을 세우면 진행 중인 요청을 기다리지 않고 멈춥니다. 멈춘 키워드는 on_error 로
+DeadlineExceeded/JobCancelled 를 받고, 그때까지 확정된 순위만 결과에 남습니다.
+"""
+
+import os
+import re
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import naver_api
+from response_cache import normalize_query
+from mall_matcher import MallMatcher
+from product_index import ProductIndex, product_key
+
+PAGE_SIZE = 100
+MAX_RANK = 1000
+DEFAULT_CONCURRENCY = int(os.getenv("RANK_CONCURRENCY", "8"))
+DEFAULT_SCAN_MODE = os.getenv("RANK_SCAN_MODE", "first_hit")
+DEFAULT_MAX_DEPTH = int(os.getenv("RANK_MAX_DEPTH", str(MAX_RANK)))
+# first_hit 방식에서 키워드당 미리 요청해 둘 페이지 수
+FIRST_HIT_PREFETCH = int(os.getenv("RANK_FIRST_HIT_PREFETCH", "2"))
+# stable 방식에서 확인 없이 받아들일 이전 순위 페이지와의 거리 (페이지 수)
+PROBE_RADIUS = int(os.getenv("RANK_PROBE_RADIUS", "1"))
+# 작업 전체 제한 시간 (초, 0 이면 제한 없음)과 취소 신호 확인 주기
+DEFAULT_DEADLINE = float(os.getenv("RANK_JOB_DEADLINE", "0"))
+CANCEL_POLL_SECONDS = 0.1
+
+SCAN_MODES = ("first_hit", "full", "probe", "stable")
+PROBE_MODES = ("probe", "stable")
+
+class ScanInterrupted(Exception):
+    """조회 작업이 중간에 멈춤 (결과가 불완전함)"""
+
+class DeadlineExceeded(ScanInterrupted):
+    """작업 제한 시간 초과"""
+
+class JobCancelled(ScanInterrupted):
+    """호출한 쪽에서 작업 취소"""
+
+class JobGuard:
+    """조회 작업 한 번의 마감 시각과 취소 신호"""
+
+    def __init__(self, deadline=None, cancel=None):
+        self.expires = time.monotonic() + deadline if deadline else None
+        self.cancel = cancel
+
+    def check(self):
+        """취소되었거나 마감이 지났으면 예외"""
+        if self.cancel is not None and self.cancel.is_set():
+            raise JobCancelled("조회가 취소되었습니다.")
+        if self.expires is not None and time.monotonic() >= self.expires:
+            raise DeadlineExceeded("조회 제한 시간을 넘겼습니다.")
+
+    async def wait(self, future):
+        """future 결과를 기다리되 마감/취소되면 기다리지 않고 예외"""
+        if self.cancel is None and self.expires is None:
+            return await future
+        try:
+            while True:
+                timeout = CANCEL_POLL_SECONDS
+                if self.expires is not None:
+                    timeout = min(timeout, max(0, self.expires - time.monotonic()))
+                done, _ = await asyncio.wait({future}, timeout=timeout)
+                if done:
+                    return future.result()
+                self.check()
+        except BaseException:
+            # 아직 시작하지 않은 요청은 취소 (이미 나간 요청은 끝나면 버림)
+            future.cancel()
+            raise
+
+def unique_keywords(keywords):
+    """정규화 기준으로 중복 키워드를 제거 (처음 나온 표기 유지)"""
+    seen = set()
+    unique = []
+    for keyword in keywords:
+        key = normalize_query(keyword)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(keyword)
+    return unique
+
+def page_starts(max_depth=MAX_RANK):
+    """조회할 페이지의 start 값 목록 (1, 101, 201, ...)"""
+    max_depth = max(1, min(max_depth, MAX_RANK))
+    return list(range(1, max_depth + 1, PAGE_SIZE))
+
+def page_display(start, max_depth=MAX_RANK):
+    """조회 깊이를 넘지 않도록 한 페이지에서 받을 상품 수"""
+    return min(PAGE_SIZE, min(max_depth, MAX_RANK) - start + 1)
+
+def make_product(item, rank):
+    """검색 결과 항목을 순위 결과 dict 로 변환"""
+    return {
+        "rank": rank,
+        "title": re.sub(r"<.*?>", "", item["title"]),
+        "price": item["lprice"],
+        "link": item["link"],
+        "mallName": item["mallName"],
+        "productId": item.get("productId")
+    }
+
+def find_first_matches(result, start, matcher, pending):
+    """한 페이지에서 아직 못 찾은 대상(판매처/상품)별 첫 일치 상품 반환 (대상 → 상품)"""
+    found = {}
+    for idx, item in enumerate(result.get("items", []), start=1):
+        for target in matcher.match_item(item):
+            if target in pending and target not in found:
+                found[target] = make_product(item, start + idx - 1)
+        if len(found) == len(pending):
+            break
+    return found
+
+def find_first_match(result, start, mall_name):
+    """한 페이지에서 판매처와 처음 일치하는 상품 반환 (없으면 None)"""
+    found = find_first_matches(result, start, MallMatcher([mall_name]), {mall_name})
+    return found.get(mall_name)
+
+def is_last_page(result, start, display):
+    """더 이상 뒤 페이지가 없는지 확인"""
+    return len(result.get("items", [])) < display or result.get("total", MAX_RANK) < start + display
+
+def hint_page(rank, page_count):
+    """이전 순위가 있던 페이지 번호 (0부터, 순위가 없으면 첫 페이지)"""
+    if not rank or rank < 1:
+        return 0
+    return min((rank - 1) // PAGE_SIZE, page_count - 1)
+
+def probe_order(page_count, hint_pages):
+    """이전 순위 페이지부터 바깥쪽으로 넓혀 가는 페이지 조회 순서 (거리가 같으면 앞 페이지 먼저)"""
+    hint_pages = set(hint_pages) or {0}
+    return sorted(range(page_count), key=lambda i: (min(abs(i - h) for h in hint_pages), i))
+
+class RankEngine:
+    """키워드 × 페이지 요청을 동시 실행하는 순위 조회 엔진"""
+
+    def __init__(self, concurrency=None, fetch_page=None, scan_mode=None, max_depth=None,
+                 deadline=None, cancel=None):
+        self.concurrency = max(1, concurrency or DEFAULT_CONCURRENCY)
+        self.fetch_page = fetch_page or naver_api.rank_page
+        self.scan_mode = scan_mode or DEFAULT_SCAN_MODE
+        if self.scan_mode not in SCAN_MODES:
+            raise ValueError(f"지원하지 않는 조회 방식: {self.scan_mode}")
+        self.max_depth = max(1, min(max_depth or DEFAULT_MAX_DEPTH, MAX_RANK))
+        self.deadline = DEFAULT_DEADLINE if deadline is None else deadline
+        self.cancel = cancel
+
+    async def _fetch(self, loop, executor, semaphore, guard, keyword, start):
+        display = page_display(start, self.max_depth)
+        async with semaphore:
+            guard.check()
+            return await guard.wait(
+                loop.run_in_executor(executor, self.fetch_page, keyword, start, display)
+            )
+
+    async def _scan_keyword(self, loop, executor, semaphore, guard, keyword, matcher,
+                            on_page=None, on_error=None, hints=None):
+        if self.scan_mode in PROBE_MODES:
+            return await self._probe_keyword(
+                loop, executor, semaphore, guard, keyword, matcher, hints, on_page, on_error
+            )
+        starts = page_starts(self.max_depth)
+        # full 은 모든 페이지를 한꺼번에, first_hit 은 앞 페이지부터 조금씩 미리 요청
+        window = len(starts) if self.scan_mode == "full" else max(1, FIRST_HIT_PREFETCH)
+        tasks = {}
+
+        def schedule_until(index):
+            for i in range(len(tasks), min(index, len(starts))):
+                tasks[i] = asyncio.ensure_future(
+                    self._fetch(loop, executor, semaphore, guard, keyword, starts[i])
+                )
+
+        def cancel_pending():
+            for task in tasks.values():
+                task.cancel()
+
+        best = {target: None for target in matcher.targets}
+        pending = set(best)
+        if not pending:
+            return best
+        for i, start in enumerate(starts):
+            schedule_until(i + window)
+            try:
+                result = await tasks[i]
+            except Exception as e:
+                # 실패한 페이지 이후는 순위를 보장할 수 없으므로 기존처럼 중단
+                cancel_pending()
+                if on_error:
+                    on_error(keyword, e)
+                break
+            if on_page:
+                on_page(keyword, start)
+            if pending:
+                # 앞 페이지에 일치 상품이 없었으므로 이 페이지의 첫 일치가 최고 순위
+                found = find_first_matches(result, start, matcher, pending)
+                best.update(found)
+                pending.difference_update(found)
+                if not pending and self.scan_mode == "first_hit":
+                    cancel_pending()
+                    break
+            if is_last_page(result, start, page_display(start, self.max_depth)):
+                cancel_pending()
+                break
+        return best
+
+    async def _probe_keyword(self, loop, executor, semaphore, guard, keyword, matcher, hints,
+                             on_page=None, on_error=None):
+        """이전 순위 페이지부터 바깥쪽으로 넓혀 가며 판매처별 최고 순위 확정
+
+        판매처의 가장 앞 일치 페이지보다 앞 페이지를 모두 받았으면 최고 순위가
+        증명된 것(verified=True)이고, 끝 페이지까지 일치가 없으면 순위 밖입니다.
+        stable 방식은 이전 순위 근처 일치를 앞 페이지 확인 없이 받아들입니다.
+        """
+        starts = page_starts(self.max_depth)
+        best = {target: None for target in matcher.targets}
+        if not best:
+            return best
+        hint_pages = {target: hint_page((hints or {}).get(target), len(starts))
+                      for target in best}
+        order = probe_order(len(starts), hint_pages.values())
+        window = max(1, FIRST_HIT_PREFETCH)
+        fetched = set()
+        # 대상 → {페이지 번호: 그 페이지의 첫 일치 상품}
+        matches = {target: {} for target in best}
+        pending = set(best)
+        last_index = len(starts) - 1
+        running = {}
+        position = 0
+
+        def all_fetched(end):
+            return all(i in fetched for i in range(end))
+
+        def resolve(target):
+            pages = matches[target]
+            if pages:
+                first = min(pages)
+                if all_fetched(first):
+                    return dict(pages[first], verified=True)
+                if (self.scan_mode == "stable" and (hints or {}).get(target)
+                        and abs(first - hint_pages[target]) <= PROBE_RADIUS):
+                    return dict(pages[first], verified=False)
+            return None
+
+        def useful(i):
+            # 모든 남은 판매처가 이미 더 앞 페이지에서 일치했다면 받을 필요 없음
+            return any(not matches[m] or min(matches[m]) > i for m in pending)
+
+        def cancel_running():
+            for task in running:
+                task.cancel()
+
+        while pending:
+            while len(running) < window and position < len(order):
+                i = order[position]
+                position += 1
+                if i <= last_index and useful(i):
+                    task = asyncio.ensure_future(
+                        self._fetch(loop, executor, semaphore, guard, keyword, starts[i])
+                    )
+                    running[task] = i
+            if not running:
+                break
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                i = running.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    # 확정된 판매처만 남기고 중단 (나머지는 순위를 보장할 수 없음)
+                    cancel_running()
+                    if on_error:
+                        on_error(keyword, e)
+                    return best
+                fetched.add(i)
+                if on_page:
+                    on_page(keyword, starts[i])
+                for target, product in find_first_matches(result, starts[i], matcher, set(best)).items():
+                    matches[target][i] = product
+                if is_last_page(result, starts[i], page_display(starts[i], self.max_depth)):
+                    last_index = min(last_index, i)
+            for target in list(pending):
+                product = resolve(target)
+                if product is not None:
+                    best[target] = product
+                    pending.discard(target)
+                elif not matches[target] and all_fetched(last_index + 1):
+                    pending.discard(target)
+        cancel_running()
+        return best
+
+    async def check_mall_ranks_async(self, keywords, mall_names, on_result=None,
+                                     on_page=None, on_error=None, hints=None):
+        """키워드마다 결과 페이지를 한 번만 훑어 판매처별 최고 순위 조회
+
+        반환값은 {키워드: {판매처: 상품 dict 또는 None}} 입니다.
+        hints 는 probe/stable 방식에서 쓰는 이전 순위 {키워드: {판매처: 순위}} 입니다.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        matcher = MallMatcher(mall_names)
+        # 표기만 다른 같은 키워드("키보드", "키보드 ")는 한 번만 조회
+        groups = {}
+        for keyword in keywords:
+            groups.setdefault(normalize_query(keyword), []).append(keyword)
+        key_hints = {normalize_query(keyword): ranks for keyword, ranks in (hints or {}).items()}
+        results = {}
+        guard = JobGuard(self.deadline, self.cancel)
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            async def run_one(key, variants):
+                best = await self._scan_keyword(
+                    loop, executor, semaphore, guard, key, matcher, on_page, on_error,
+                    key_hints.get(key)
+                )
+                for keyword in dict.fromkeys(variants):
+                    results[keyword] = best
+                    if on_result:
+                        on_result(keyword, best)
+
+            await asyncio.gather(*(run_one(key, variants) for key, variants in groups.items()))
+        finally:
+            # 마감/취소로 멈췄으면 이미 나간 요청이 끝나기를 기다리지 않음
+            executor.shutdown(wait=False, cancel_futures=True)
+        # 입력 순서대로 정렬해서 반환
+        return {keyword: results.get(keyword) for keyword in keywords}
+
+    async def check_ranks_async(self, keywords, mall_name, on_result=None,
+                                on_page=None, on_error=None, hints=None):
+        """키워드별 판매처 최고 순위를 동시 조회 (키워드 → 상품 dict 또는 None)
+
+        hints 는 probe/stable 방식에서 쓰는 이전 순위 {키워드: 순위} 입니다.
+        """
+        def on_mall_result(keyword, best):
+            if on_result:
+                on_result(keyword, best[mall_name])
+
+        mall_hints = {keyword: {mall_name: rank} for keyword, rank in (hints or {}).items()}
+        results = await self.check_mall_ranks_async(
+            keywords, [mall_name], on_mall_result, on_page, on_error, mall_hints
+        )
+        return {keyword: best[mall_name] for keyword, best in results.items()}
+
+    async def check_product_ranks_async(self, watches, on_result=None, on_page=None,
+                                        on_error=None, hints=None):
+        """키워드별 추적 상품(productId 또는 link)의 순위 조회
+
+        watches 는 {키워드: [상품 ID, ...]}, 반환값은 {키워드: {상품 ID: 상품 dict 또는 None}}
+        입니다. 키워드마다 그 키워드의 추적 상품만 담은 색인으로 결과 페이지를 훑습니다.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        groups = {}
+        for keyword, products in watches.items():
+            variants, index = groups.setdefault(normalize_query(keyword), ([], ProductIndex()))
+            variants.append(keyword)
+            for product in products:
+                index.add(product)
+        key_hints = {normalize_query(keyword): ranks for keyword, ranks in (hints or {}).items()}
+        results = {}
+        guard = JobGuard(self.deadline, self.cancel)
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            async def run_one(key, variants, index):
+                best = await self._scan_keyword(
+                    loop, executor, semaphore, guard, key, index, on_page, on_error,
+                    key_hints.get(key)
+                )
+                for keyword in dict.fromkeys(variants):
+                    results[keyword] = best
+                    if on_result:
+                        on_result(keyword, best)
+
+            await asyncio.gather(*(run_one(key, variants, index)
+                                   for key, (variants, index) in groups.items()))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return {keyword: results.get(keyword) for keyword in watches}
+
+    def check_mall_ranks(self, keywords, mall_names, on_result=None, on_page=None, on_error=None,
+                         hints=None):
+        """check_mall_ranks_async 의 동기 실행 버전"""
+        return asyncio.run(
+            self.check_mall_ranks_async(keywords, mall_names, on_result, on_page, on_error, hints)
+        )
+
+    def check_ranks(self, keywords, mall_name, on_result=None, on_page=None, on_error=None,
+                    hints=None):
+        """check_ranks_async 의 동기 실행 버전 (스레드 내 새 이벤트 루프 사용)"""
+        return asyncio.run(
+            self.check_ranks_async(keywords, mall_name, on_result, on_page, on_error, hints)
+        )
+
+    def check_product_ranks(self, watches, on_result=None, on_page=None, on_error=None, hints=None):
+        """check_product_ranks_async 의 동기 실행 버전"""
+        return asyncio.run(
+            self.check_product_ranks_async(watches, on_result, on_page, on_error, hints)
+        )
+
+def check_ranks(keywords, mall_name, concurrency=None, on_result=None, on_page=None,
+                on_error=None, scan_mode=None, max_depth=None, fetch_page=None, hints=None,
+                deadline=None, cancel=None):
+    """기본 엔진으로 여러 키워드의 판매처 최고 순위 조회"""
+    engine = RankEngine(concurrency, fetch_page, scan_mode, max_depth, deadline, cancel)
+    return engine.check_ranks(keywords, mall_name, on_result, on_page, on_error, hints)
+
+def check_mall_ranks(keywords, mall_names, concurrency=None, on_result=None, on_page=None,
+                     on_error=None, scan_mode=None, max_depth=None, fetch_page=None, hints=None,
+                     deadline=None, cancel=None):
+    """기본 엔진으로 여러 키워드 × 여러 판매처의 최고 순위를 한 번의 조회로 계산"""
+    engine = RankEngine(concurrency, fetch_page, scan_mode, max_depth, deadline, cancel)
+    return engine.check_mall_ranks(keywords, mall_names, on_result, on_page, on_error, hints)
+
+def get_top_ranked_product_by_mall(keyword, mall_name, concurrency=None, on_page=None,
+                                   on_error=None, scan_mode=None, max_depth=None, hint_rank=None,
+                                   deadline=None, cancel=None, fetch_page=None):
+    """단일 키워드의 판매처 최고 순위 상품 조회 (hint_rank 는 probe/stable 방식의 이전 순위)"""
+    return check_ranks(
+        [keyword], mall_name, concurrency, on_page=on_page, on_error=on_error,
+        scan_mode=scan_mode, max_depth=max_depth, fetch_page=fetch_page,
+        hints={keyword: hint_rank} if hint_rank else None, deadline=deadline, cancel=cancel
+    )[keyword]
+
+def check_product_ranks(watches, concurrency=None, on_result=None, on_page=None, on_error=None,
+                        scan_mode=None, max_depth=None, fetch_page=None, hints=None,
+                        deadline=None, cancel=None):
+    """기본 엔진으로 키워드별 추적 상품 순위 조회 ({키워드: [상품 ID]} → {키워드: {상품 ID: 상품}})"""
+    engine = RankEngine(concurrency, fetch_page, scan_mode, max_depth, deadline, cancel)
+    return engine.check_product_ranks(watches, on_result, on_page, on_error, hints)
+
+def get_product_rank(keyword, product, concurrency=None, on_page=None, on_error=None,
+                     scan_mode=None, max_depth=None, hint_rank=None, deadline=None, cancel=None,
+                     fetch_page=None):
+    """단일 키워드에서 특정 상품(productId 또는 link)의 순위 조회 (없으면 None)"""
+    product = product_key(product)
+    return check_product_ranks(
+        {keyword: [product]}, concurrency, on_page=on_page, on_error=on_error,
+        scan_mode=scan_mode, max_depth=max_depth, fetch_page=fetch_page,
+        hints={keyword: {product: hint_rank}} if hint_rank else None,
+        deadline=deadline, cancel=cancel
+    )[keyword][product]
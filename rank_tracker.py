@@ -0,0 +1,504 @@
+"""
+네이버 순위 확인기 - 순위 추적 데몬
+Copyright ⓒ 2025 happy. All rights reserved.
+
+감시 목록(watchlist.csv)의 (키워드, 판매처) 마다 정해 둔 주기로 최고 순위를
+조회하고, 모든 관측값을 시각과 함께 SQLite 에 기록합니다. Qt/Streamlit 없이
+서버에서 계속 실행하는 용도입니다.
+
+- 항목별 첫 실행 시각을 주기 안에서 고르게 흩어 두고, 연속 조회 사이에 최소
+  간격을 두어 하루 동안 호출이 한꺼번에 몰리지 않습니다.
+- 다음 실행 시각은 조회가 끝날 때마다 DB 에 저장하므로 재시작해도 일정이
+  그대로 이어지고, 중단 직전에 돌던 항목만 다시 조회합니다.
+- 직전 순위가 있으면 그 페이지부터 조회합니다(TRACKER_SCAN_MODE, 기본 stable).
+  stable 로 확인 없이 받아들인 순위는 verified=0 으로 기록하고, 연속
+  TRACKER_VERIFY_EVERY 번째 조회는 앞 페이지까지 확인하는 probe 방식으로 실행합니다.
+- 하루 예산(--budget, TRACKER_DAILY_BUDGET)을 주면 주기는 최소 간격이 되고,
+  주기가 지난 항목 중 순위 변동성 × 경과 시간 × 중요도 점수가 높은 것부터
+  예산을 하루 동안 고르게 나눠 씁니다 (refresh_priority).
+
+사용 예:
+    python rank_tracker.py --watchlist watchlist.csv
+
+감시 목록 CSV 는 keyword,mall,interval_minutes,importance 열이며 주기를 비우면
+TRACKER_INTERVAL_MINUTES, 중요도를 비우면 1 을 씁니다. 판매처 대신
+product:<상품ID> 를 적으면 그 상품(SKU) 자체의 순위를 productId 로 추적합니다.
+실행 중 파일을 고치면 다음 순번에 반영됩니다.
+"""
+
+import os
+import sys
+import csv
+import time
+import signal
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+
+import naver_api
+import rank_engine
+import refresh_priority
+import serp_archive
+
+TRACKER_PATH = os.getenv("TRACKER_PATH", "naver_tracker.db")
+WATCHLIST_PATH = os.getenv("WATCHLIST_PATH", "watchlist.csv")
+TRACKER_INTERVAL_MINUTES = float(os.getenv("TRACKER_INTERVAL_MINUTES", "240"))
+# 조회 실패 시 다시 시도할 때까지 기다리는 시간 (초)
+TRACKER_RETRY_SECONDS = float(os.getenv("TRACKER_RETRY_SECONDS", "600"))
+# 감시 목록이 비었거나 할 일이 없을 때 최대 대기 시간 (초)
+TRACKER_IDLE_SECONDS = float(os.getenv("TRACKER_IDLE_SECONDS", "60"))
+# 이전 순위를 아는 항목의 조회 방식 (rank_engine 의 probe/stable)
+TRACKER_SCAN_MODE = os.getenv("TRACKER_SCAN_MODE", "stable")
+# 확인 없이 받아들인 순위가 이만큼 이어지면 다음 조회는 앞 페이지까지 확인
+TRACKER_VERIFY_EVERY = int(os.getenv("TRACKER_VERIFY_EVERY", "6"))
+# 하루 페이지 요청 예산 (0 이면 예산 배분 없이 주기대로 실행)
+TRACKER_DAILY_BUDGET = int(os.getenv("TRACKER_DAILY_BUDGET", "0"))
+# 판매처 대신 특정 상품을 추적하는 감시 목록 항목 표시
+PRODUCT_PREFIX = "product:"
+DAY_SECONDS = 24 * 60 * 60
+# 예산 하루의 시작 (네이버 쿼터와 같은 한국 시간 자정)
+KST_OFFSET_SECONDS = 9 * 60 * 60
+
+class WatchEntry:
+    """감시 목록 한 줄 (키워드, 판매처, 조회 주기, 중요도)"""
+
+    __slots__ = ("keyword", "mall", "interval", "importance")
+
+    def __init__(self, keyword, mall, interval, importance=1.0):
+        self.keyword = keyword
+        self.mall = mall
+        self.interval = interval
+        self.importance = importance
+
+    @property
+    def key(self):
+        return (self.keyword, self.mall)
+
+    def phase(self):
+        """주기 안에서 이 항목이 실행될 위치 (초) - 항목마다 고르게 흩어지도록 해시로 결정"""
+        digest = hashlib.sha1(f"{self.keyword}\t{self.mall}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2 ** 64 * self.interval
+
+    def first_due(self, now):
+        """처음 등록된 항목의 첫 실행 시각"""
+        period_start = now - now % self.interval
+        due = period_start + self.phase()
+        return due if due >= now else due + self.interval
+
+def read_watchlist(path):
+    """감시 목록 CSV 읽기 (키워드당 판매처는 ';' 로 여러 개 지정 가능)"""
+    entries = {}
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for i, row in enumerate(csv.reader(f)):
+            if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+                continue
+            if i == 0 and row[0].strip().lower() == "keyword":
+                continue
+            keyword = row[0].strip()
+            malls = [m.strip() for m in row[1].split(";") if m.strip()] if len(row) > 1 else []
+            minutes = row[2].strip() if len(row) > 2 else ""
+            interval = float(minutes) * 60 if minutes else TRACKER_INTERVAL_MINUTES * 60
+            importance = row[3].strip() if len(row) > 3 else ""
+            importance = float(importance) if importance else 1.0
+            for mall in malls:
+                entries[(keyword, mall)] = WatchEntry(keyword, mall, max(interval, 60), importance)
+    return list(entries.values())
+
+def min_gap(entries):
+    """연속 조회 사이 최소 간격 (초)
+
+    하루 예정 조회 수의 두 배를 처리할 수 있는 간격이라 재시작 직후 밀린 항목도
+    한꺼번에 몰리지 않고 하루 안에 따라잡습니다.
+    """
+    checks_per_day = sum(DAY_SECONDS / entry.interval for entry in entries)
+    return DAY_SECONDS / (2 * checks_per_day) if checks_per_day else 0
+
+def day_start(now):
+    """now 가 속한 예산 하루의 시작 시각 (한국 시간 자정)"""
+    return now - (now + KST_OFFSET_SECONDS) % DAY_SECONDS
+
+def scan_mode_for(unverified):
+    """미확인 관측이 이어진 횟수에 따라 이번 조회 방식 결정"""
+    if TRACKER_SCAN_MODE == "stable" and unverified + 1 >= TRACKER_VERIFY_EVERY:
+        return "probe"
+    return TRACKER_SCAN_MODE
+
+class TrackerStore:
+    """추적 일정과 순위 관측값 저장소"""
+
+    def __init__(self, path=TRACKER_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS schedule ("
+            " keyword TEXT NOT NULL,"
+            " mall TEXT NOT NULL,"
+            " interval REAL NOT NULL,"
+            " next_due REAL NOT NULL,"
+            " last_checked REAL,"
+            " PRIMARY KEY (keyword, mall))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS observations ("
+            " keyword TEXT NOT NULL,"
+            " mall TEXT NOT NULL,"
+            " checked_at REAL NOT NULL,"
+            " rank INTEGER,"
+            " title TEXT,"
+            " price TEXT,"
+            " link TEXT,"
+            " verified INTEGER,"
+            " calls INTEGER)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(observations)")}
+        for column in ("verified", "calls"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE observations ADD COLUMN {column} INTEGER")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS observations_by_entry"
+            " ON observations (keyword, mall, checked_at)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS failures ("
+            " keyword TEXT NOT NULL,"
+            " mall TEXT NOT NULL,"
+            " checked_at REAL NOT NULL,"
+            " calls INTEGER)"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def sync(self, entries, now):
+        """감시 목록을 일정에 반영 - 새 항목은 흩어진 첫 실행 시각으로 등록
+
+        이미 있는 항목은 저장된 다음 실행 시각을 유지하고, 주기가 바뀌었으면
+        남은 대기 시간이 새 주기를 넘지 않게 당깁니다.
+        """
+        conn = self._connect()
+        rows = conn.execute("SELECT keyword, mall, interval, next_due FROM schedule").fetchall()
+        known = {(keyword, mall): (interval, next_due) for keyword, mall, interval, next_due in rows}
+        for entry in entries:
+            if entry.key not in known:
+                conn.execute(
+                    "INSERT INTO schedule (keyword, mall, interval, next_due) VALUES (?, ?, ?, ?)",
+                    (entry.keyword, entry.mall, entry.interval, entry.first_due(now))
+                )
+            elif known[entry.key][0] != entry.interval:
+                next_due = min(known[entry.key][1], now + entry.interval)
+                conn.execute(
+                    "UPDATE schedule SET interval = ?, next_due = ? WHERE keyword = ? AND mall = ?",
+                    (entry.interval, next_due, entry.keyword, entry.mall)
+                )
+
+    def due(self, entries, now):
+        """실행 시각이 지난 항목을 오래 밀린 순서로 반환"""
+        wanted = {entry.key: entry for entry in entries}
+        rows = self._connect().execute(
+            "SELECT keyword, mall FROM schedule WHERE next_due <= ? ORDER BY next_due", (now,)
+        ).fetchall()
+        return [wanted[key] for key in map(tuple, rows) if key in wanted]
+
+    def next_due(self, entries):
+        """감시 중인 항목 중 가장 이른 다음 실행 시각 (없으면 None)"""
+        wanted = {entry.key for entry in entries}
+        rows = self._connect().execute("SELECT keyword, mall, next_due FROM schedule").fetchall()
+        times = [next_due for keyword, mall, next_due in rows if (keyword, mall) in wanted]
+        return min(times) if times else None
+
+    def reschedule(self, entry, next_due, checked_at=None):
+        """다음 실행 시각 저장 (checked_at 이 있으면 마지막 조회 시각도 갱신)"""
+        self._connect().execute(
+            "UPDATE schedule SET next_due = ?, last_checked = COALESCE(?, last_checked)"
+            " WHERE keyword = ? AND mall = ?",
+            (next_due, checked_at, entry.keyword, entry.mall)
+        )
+
+    def record(self, entry, checked_at, product, calls=None):
+        """순위 관측값 기록 (순위 밖이면 rank 가 NULL, 확인 없이 받아들인 순위는 verified 0)"""
+        product = product or {}
+        self._connect().execute(
+            "INSERT INTO observations"
+            " (keyword, mall, checked_at, rank, title, price, link, verified, calls)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (entry.keyword, entry.mall, checked_at, product.get("rank"),
+             product.get("title"), product.get("price"), product.get("link"),
+             int(product.get("verified", True)), calls)
+        )
+
+    def record_failure(self, entry, checked_at, calls):
+        """실패한 조회가 쓴 페이지 요청 수 기록 (관측 이력에는 남기지 않음)"""
+        self._connect().execute(
+            "INSERT INTO failures (keyword, mall, checked_at, calls) VALUES (?, ?, ?, ?)",
+            (entry.keyword, entry.mall, checked_at, calls)
+        )
+
+    def last_checked(self, keyword, mall):
+        """마지막으로 조회에 성공한 시각 (없으면 None)"""
+        row = self._connect().execute(
+            "SELECT last_checked FROM schedule WHERE keyword = ? AND mall = ?", (keyword, mall)
+        ).fetchone()
+        return row[0] if row else None
+
+    def spent_since(self, since):
+        """since 이후 조회에 쓴 페이지 요청 수 (실패한 조회 포함)"""
+        row = self._connect().execute(
+            "SELECT (SELECT COALESCE(SUM(calls), 0) FROM observations WHERE checked_at >= ?)"
+            " + (SELECT COALESCE(SUM(calls), 0) FROM failures WHERE checked_at >= ?)",
+            (since, since)
+        ).fetchone()
+        return row[0]
+
+    def last_rank(self, keyword, mall):
+        """직전 관측 순위와 그 뒤로 이어진 미확인 관측 수 (관측이 없으면 (None, 0))"""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT rank FROM observations WHERE keyword = ? AND mall = ?"
+            " ORDER BY checked_at DESC LIMIT 1", (keyword, mall)
+        ).fetchone()
+        if row is None:
+            return None, 0
+        unverified = conn.execute(
+            "SELECT COUNT(*) FROM observations WHERE keyword = ? AND mall = ? AND checked_at >"
+            " (SELECT COALESCE(MAX(checked_at), 0) FROM observations"
+            "  WHERE keyword = ? AND mall = ? AND COALESCE(verified, 1))",
+            (keyword, mall, keyword, mall)
+        ).fetchone()[0]
+        return row[0], unverified
+
+    def history(self, keyword, mall, since=None):
+        """관측값 목록 [(시각, 순위)] (오래된 순)"""
+        rows = self._connect().execute(
+            "SELECT checked_at, rank FROM observations"
+            " WHERE keyword = ? AND mall = ? AND checked_at >= ? ORDER BY checked_at",
+            (keyword, mall, since or 0)
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+def check_entry(entry, hint_rank=None, scan_mode=None, on_page=None):
+    """판매처 최고 순위(또는 추적 상품 순위) 한 항목 조회 - 페이지 오류는 예외로 전달
+
+    관측 이력이 변동성 점수에 쓰이므로 캐시를 읽지 않고 항상 API 에서 받은 페이지로 조회합니다.
+    """
+    errors = []
+    if entry.mall.startswith(PRODUCT_PREFIX):
+        product = rank_engine.get_product_rank(
+            entry.keyword, entry.mall[len(PRODUCT_PREFIX):], on_page=on_page,
+            on_error=lambda keyword, e: errors.append(e), scan_mode=scan_mode, hint_rank=hint_rank,
+            fetch_page=naver_api.fresh_shop_page
+        )
+    else:
+        product = rank_engine.get_top_ranked_product_by_mall(
+            entry.keyword, entry.mall, on_page=on_page, on_error=lambda keyword, e: errors.append(e),
+            scan_mode=scan_mode, hint_rank=hint_rank, fetch_page=naver_api.fresh_shop_page
+        )
+    if errors:
+        # 일부 페이지를 못 받은 결과는 순위가 틀릴 수 있으므로 기록하지 않음
+        raise errors[0]
+    return product
+
+def log(message):
+    print(f"[{datetime.now().isoformat(timespec='seconds')}] {message}", file=sys.stderr, flush=True)
+
+class RankTracker:
+    """감시 목록 순위 추적 스케줄러"""
+
+    def __init__(self, watchlist_path=WATCHLIST_PATH, store=None, check=None,
+                 clock=time.time, daily_budget=None):
+        self.watchlist_path = watchlist_path
+        self.store = store or TrackerStore()
+        self.check = check or check_entry
+        self.clock = clock
+        self.daily_budget = TRACKER_DAILY_BUDGET if daily_budget is None else daily_budget
+        self.stop_event = threading.Event()
+        self.entries = []
+        self._watchlist_mtime = None
+        self._last_check_at = 0
+
+    def reload(self):
+        """감시 목록 파일이 바뀌었으면 다시 읽어 일정에 반영"""
+        try:
+            mtime = os.path.getmtime(self.watchlist_path)
+        except OSError:
+            if self._watchlist_mtime is not None or not self.entries:
+                log(f"감시 목록을 찾을 수 없습니다: {self.watchlist_path}")
+            self._watchlist_mtime = None
+            return
+        if mtime == self._watchlist_mtime:
+            return
+        try:
+            entries = read_watchlist(self.watchlist_path)
+        except (OSError, ValueError) as e:
+            log(f"감시 목록 읽기 실패 (이전 목록 유지): {e}")
+            return
+        self._watchlist_mtime = mtime
+        self.entries = entries
+        self.store.sync(entries, self.clock())
+        if self.daily_budget:
+            log(f"감시 목록 {len(entries)}개 항목, 하루 예산 {self.daily_budget:,}회")
+        else:
+            log(f"감시 목록 {len(entries)}개 항목, 최소 조회 간격 {min_gap(entries):.0f}초")
+
+    def run_entry(self, entry):
+        """한 항목 조회 후 관측값 기록과 다음 일정 저장"""
+        started = self.clock()
+        hint_rank, unverified = self.store.last_rank(entry.keyword, entry.mall)
+        scan_mode = scan_mode_for(unverified)
+        pages = []
+        try:
+            product = self.check(entry, hint_rank, scan_mode if hint_rank else None,
+                                 lambda keyword, start: pages.append(start))
+        except Exception as e:
+            log(f"조회 실패 ({entry.keyword} / {entry.mall}): {e}")
+            # 실패한 페이지 요청도 할당량을 썼으므로 받은 페이지에 한 번을 더해 예산에 반영
+            self.store.record_failure(entry, self.clock(), len(pages) + 1)
+            self.store.reschedule(entry, started + min(TRACKER_RETRY_SECONDS, entry.interval))
+            return None
+        checked_at = self.clock()
+        self.store.record(entry, checked_at, product, len(pages))
+        if self.daily_budget:
+            # 예산 배분에서 주기는 최소 간격 - 다음 조회 시점은 점수가 정함
+            next_due = started + entry.interval
+        else:
+            # 주기는 조회 시각이 아니라 예정 격자 기준으로 이어가 항목 간 간격이 유지되도록 함
+            next_due = started + entry.interval - (started - entry.phase()) % entry.interval
+        self.store.reschedule(entry, next_due, checked_at)
+        rank = product["rank"] if product else None
+        note = " (미확인)" if product and not product.get("verified", True) else ""
+        log(f"{entry.keyword} / {entry.mall}: {rank if rank else '순위 밖'}{note}")
+        # 조회마다 받은 페이지를 보관소에 바로 기록해 다른 프로세스에서도 보이게 함
+        archive = serp_archive.get_archive()
+        if archive is not None:
+            archive.flush()
+        return product
+
+    def candidates(self, entries, now):
+        """항목별 갱신 후보 (변동성 점수, 예상 호출 수)"""
+        since = now - refresh_priority.HISTORY_DAYS * DAY_SECONDS
+        result = []
+        for entry in entries:
+            hint_rank, unverified = self.store.last_rank(entry.keyword, entry.mall)
+            result.append(refresh_priority.make_candidate(
+                entry, self.store.history(entry.keyword, entry.mall, since),
+                self.store.last_checked(entry.keyword, entry.mall), now,
+                hint_rank, scan_mode_for(unverified)
+            ))
+        return result
+
+    def run_budgeted(self):
+        """주기가 지난 항목을 점수 순으로, 하루 예산을 시간에 비례해 나눠 쓰며 실행
+
+        우선순위는 실행마다 한 번만 계산하고, 항목 사이에는 쓴 요청 수만 다시 확인합니다.
+        """
+        now = self.clock()
+        start_of_day = day_start(now)
+        chosen = refresh_priority.allocate(
+            self.candidates(self.store.due(self.entries, now), now),
+            self.daily_budget - self.store.spent_since(start_of_day)
+        )
+        done = 0
+        for candidate in chosen:
+            now = self.clock()
+            if self.stop_event.is_set() or day_start(now) != start_of_day:
+                break
+            # 지금까지 쓸 수 있는 몫 - 하루 동안 예산이 고르게 풀림
+            allowed = self.daily_budget * (now - start_of_day) / DAY_SECONDS
+            if self.store.spent_since(start_of_day) >= allowed:
+                break
+            self.run_entry(candidate.entry)
+            done += 1
+        return done
+
+    def run_once(self):
+        """밀린 항목을 최소 간격(또는 하루 예산)을 지키며 실행하고 실행한 항목 수 반환"""
+        self.reload()
+        if self.daily_budget:
+            return self.run_budgeted()
+        gap = min_gap(self.entries)
+        done = 0
+        for entry in self.store.due(self.entries, self.clock()):
+            wait = self._last_check_at + gap - self.clock()
+            if wait > 0 and self.stop_event.wait(wait):
+                break
+            if self.stop_event.is_set():
+                break
+            self._last_check_at = self.clock()
+            self.run_entry(entry)
+            done += 1
+        return done
+
+    def run_forever(self):
+        """중지 요청이 올 때까지 일정대로 계속 실행"""
+        log("순위 추적 시작")
+        while not self.stop_event.is_set():
+            self.run_once()
+            next_due = self.store.next_due(self.entries)
+            if next_due is None or self.daily_budget:
+                # 예산 배분 중에는 예산이 다시 풀릴 때까지 기다림
+                wait = TRACKER_IDLE_SECONDS
+            else:
+                wait = next_due - self.clock()
+            self.stop_event.wait(min(max(wait, 0), TRACKER_IDLE_SECONDS))
+        log("순위 추적 종료")
+
+    def stop(self):
+        self.stop_event.set()
+
+def print_plan(tracker):
+    """전체 항목의 갱신 우선순위와 오늘 남은 예산으로 조회될 항목 출력"""
+    tracker.reload()
+    now = tracker.clock()
+    candidates = refresh_priority.prioritize(tracker.candidates(tracker.entries, now))
+    remaining = None
+    chosen = set()
+    if tracker.daily_budget:
+        remaining = max(tracker.daily_budget - tracker.store.spent_since(day_start(now)), 0)
+        chosen = {id(c) for c in refresh_priority.allocate(candidates, remaining)}
+        print(f"오늘 남은 예산: {remaining:,}회")
+    for c in candidates:
+        mark = "*" if id(c) in chosen else " "
+        print(f"{mark} {c.score:8.3f}  변동성 {c.volatility:6.3f}  경과 {c.age_days:5.2f}일"
+              f"  예상 {c.cost:2d}회  {c.entry.keyword} / {c.entry.mall}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="네이버 순위 확인기 - 순위 추적 데몬")
+    parser.add_argument("--watchlist", default=WATCHLIST_PATH,
+                        help="감시 목록 CSV (keyword,mall,interval_minutes,importance)")
+    parser.add_argument("--db", default=TRACKER_PATH, help="일정/관측값 SQLite 파일")
+    parser.add_argument("--once", action="store_true",
+                        help="밀린 항목만 한 번 실행하고 종료 (cron 용)")
+    parser.add_argument("--budget", type=int, default=TRACKER_DAILY_BUDGET,
+                        help="하루 페이지 요청 예산 (지정하면 변동성 우선순위로 배분)")
+    parser.add_argument("--plan", action="store_true",
+                        help="현재 우선순위와 남은 예산 배분만 출력하고 종료")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    tracker = RankTracker(args.watchlist, TrackerStore(args.db), daily_budget=args.budget)
+    if args.plan:
+        print_plan(tracker)
+        return 0
+    if args.once:
+        tracker.run_once()
+        return 0
+
+    def handle_signal(signum, frame):
+        # 진행 중인 조회는 끝까지 마치고 다음 순번 전에 종료
+        tracker.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    tracker.run_forever()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
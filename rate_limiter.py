@@ -0,0 +1,162 @@
+"""
+네이버 API 호출 속도 제한 (토큰 버킷 + 429 적응형 감속)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+(인증키, 엔드포인트) 마다 프로세스 공용 토큰 버킷을 두고 모든 호출이 토큰을
+받은 뒤 나가도록 합니다. 429 응답을 받으면 Retry-After 만큼 버킷 전체를 멈추고
+속도를 절반으로 줄이며, 이후 성공할 때마다 설정 속도까지 조금씩 회복합니다.
+연결 오류, 시간 초과, 5xx 같은 일시적 오류는 지터를 넣은 지수 백오프로
+HTTP_RETRIES 번까지만 다시 시도합니다.
+"""
+
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+
+NAVER_RATE_PER_SEC = float(os.getenv("NAVER_RATE_PER_SEC", "10"))
+NAVER_RATE_BURST = float(os.getenv("NAVER_RATE_BURST", "10"))
+RATE_LIMIT_RETRIES = int(os.getenv("RATE_LIMIT_RETRIES", "4"))
+# Retry-After 가 없을 때 기본 대기 시간 (초)
+DEFAULT_BACKOFF = 1.0
+MIN_RATE = 0.5
+# 일시적 오류 재시도 횟수와 백오프 (초) - 대기는 0 ~ min(상한, 기본 × 2^시도) 에서 무작위
+TRANSIENT_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+RETRY_BACKOFF_BASE = float(os.getenv("HTTP_RETRY_BACKOFF", "0.25"))
+RETRY_BACKOFF_CAP = 4.0
+TRANSIENT_STATUSES = (500, 502, 503, 504)
+
+def endpoint_rate(endpoint):
+    """엔드포인트 초당 호출 수 (환경변수 NAVER_RATE_<ENDPOINT> 로 재정의 가능)"""
+    override = os.getenv(f"NAVER_RATE_{endpoint.upper()}")
+    return float(override) if override else NAVER_RATE_PER_SEC
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 대기 초로 변환"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """AIMD 방식으로 속도를 조절하는 토큰 버킷"""
+
+    def __init__(self, rate, burst=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, burst or rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """토큰 하나를 받을 때까지 대기"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def try_acquire(self):
+        """기다리지 않고 토큰 하나를 받으면 True (정지 중이거나 토큰이 없으면 False)"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return False
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def throttled(self, retry_after=None):
+        """429 응답 처리 - Retry-After 동안 정지하고 속도를 절반으로"""
+        with self._lock:
+            wait = retry_after if retry_after is not None else DEFAULT_BACKOFF
+            # 여러 스레드가 동시에 재시도하지 않도록 약간의 지터 추가
+            wait += random.uniform(0, wait * 0.1 + 0.05)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + wait)
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.tokens = 0
+
+    def succeeded(self):
+        """성공 응답 처리 - 설정 속도까지 조금씩 회복"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def get_bucket(credential, endpoint):
+    """(인증키, 엔드포인트) 공용 토큰 버킷 반환"""
+    key = (credential, endpoint)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(key)
+            if bucket is None:
+                rate = endpoint_rate(endpoint)
+                bucket = TokenBucket(rate, min(NAVER_RATE_BURST, rate) if rate >= 1 else 1)
+                _buckets[key] = bucket
+    return bucket
+
+def is_transient(error):
+    """다시 시도하면 성공할 수 있는 오류인지 (연결 오류, 시간 초과, 5xx)"""
+    if isinstance(error, requests.HTTPError):
+        response = error.response
+        return response is not None and response.status_code in TRANSIENT_STATUSES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+def backoff_delay(attempt):
+    """재시도 대기 시간 (full jitter 지수 백오프)"""
+    return random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt))
+
+def call_with_limit(credential, endpoint, fn, retries=RATE_LIMIT_RETRIES, transient_retries=None):
+    """토큰을 받은 뒤 fn() 호출
+
+    429 응답이면 감속 후 retries 번까지, 일시적 오류는 지터 백오프 후
+    transient_retries 번까지 다시 시도합니다.
+    """
+    transient_retries = TRANSIENT_RETRIES if transient_retries is None else transient_retries
+    bucket = get_bucket(credential, endpoint)
+    throttled = 0
+    failed = 0
+    while True:
+        bucket.acquire()
+        try:
+            result = fn()
+        except (requests.HTTPError, requests.ConnectionError, requests.Timeout) as e:
+            response = getattr(e, "response", None)
+            if response is not None and response.status_code == 429 and throttled < retries:
+                throttled += 1
+                bucket.throttled(parse_retry_after(response.headers.get("Retry-After")))
+                continue
+            if is_transient(e) and failed < transient_retries:
+                time.sleep(backoff_delay(failed))
+                failed += 1
+                continue
+            raise
+        bucket.succeeded()
+        return result
@@ -0,0 +1,102 @@
+"""
+추적 항목 갱신 우선순위 (순위 변동성 기반 일일 예산 배분)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+추적 중인 (키워드, 판매처) 마다 관측 이력으로 순위 변동성(하루당 log 순위
+변화량)을 구하고, 마지막 조회 뒤 지난 시간과 중요도를 곱해 "지금 다시 보면
+순위가 얼마나 달라져 있을지" 점수를 매깁니다. 하루 API 예산은 점수가 높은
+항목부터 예상 호출 수만큼 배분하므로, 몇 주째 그대로인 순위보다 자주 움직이는
+순위에 호출이 먼저 갑니다.
+"""
+
+import os
+import math
+
+import rank_engine
+
+DAY_SECONDS = 24 * 60 * 60
+# 이력이 없거나 적은 항목에 쓰는 변동성 사전값 (하루당 log 순위 변화)
+PRIOR_VOLATILITY = float(os.getenv("PRIORITY_PRIOR_VOLATILITY", "0.5"))
+# 사전값을 관측 몇 번 분량으로 볼지 (관측이 쌓일수록 실제 변동성 쪽으로 이동)
+PRIOR_WEIGHT = float(os.getenv("PRIORITY_PRIOR_WEIGHT", "2"))
+# 변동이 없어도 오래된 순위는 다시 보도록 더하는 하루당 가중치
+STALENESS_WEIGHT = float(os.getenv("PRIORITY_STALENESS_WEIGHT", "0.05"))
+# 변동성 계산에 쓰는 최근 이력 기간 (일)
+HISTORY_DAYS = float(os.getenv("PRIORITY_HISTORY_DAYS", "14"))
+# 한 번도 조회하지 않은 항목의 경과 시간으로 볼 값 (일)
+UNCHECKED_AGE_DAYS = 1.0
+# 순위 밖(미노출)은 조회 깊이 바로 다음 순위로 계산
+OUT_OF_RANK = rank_engine.MAX_RANK + 1
+
+def rank_volatility(history):
+    """관측 [(시각, 순위)] 로 하루당 log 순위 변화량 추정
+
+    순위 1→2 와 500→1000 이 같은 크기로 보이도록 log 순위를 쓰고,
+    관측이 적을 때는 PRIOR_VOLATILITY 쪽으로 당겨 잡습니다.
+    """
+    points = [(checked_at, math.log(rank or OUT_OF_RANK)) for checked_at, rank in history]
+    moves = len(points) - 1
+    if moves < 1:
+        return PRIOR_VOLATILITY
+    moved = sum(abs(b - a) for (_, a), (_, b) in zip(points, points[1:]))
+    span_days = max((points[-1][0] - points[0][0]) / DAY_SECONDS, 1 / 24)
+    rate = moved / span_days
+    return (rate * moves + PRIOR_VOLATILITY * PRIOR_WEIGHT) / (moves + PRIOR_WEIGHT)
+
+def refresh_score(volatility, age_days, importance=1.0):
+    """다시 조회할 가치 점수 = 중요도 × 경과 일수 × (변동성 + 오래됨 가중치)"""
+    return importance * age_days * (volatility + STALENESS_WEIGHT)
+
+def estimate_check_calls(hint_rank, scan_mode=None, max_depth=None):
+    """한 번 조회에 드는 예상 페이지 요청 수"""
+    pages = len(rank_engine.page_starts(max_depth or rank_engine.DEFAULT_MAX_DEPTH))
+    if not hint_rank:
+        # 이전 순위가 없거나 순위 밖이었으면 조회 깊이 전체
+        return pages
+    hint_index = rank_engine.hint_page(hint_rank, pages)
+    if scan_mode == "stable":
+        return 1
+    # first_hit/probe 는 이전 순위 페이지까지 모두 확인
+    return hint_index + 1
+
+class RefreshCandidate:
+    """갱신 후보 한 건 (항목, 점수, 예상 호출 수)"""
+
+    __slots__ = ("entry", "score", "cost", "volatility", "age_days")
+
+    def __init__(self, entry, score, cost, volatility, age_days):
+        self.entry = entry
+        self.score = score
+        self.cost = cost
+        self.volatility = volatility
+        self.age_days = age_days
+
+    def __repr__(self):
+        return (f"RefreshCandidate({self.entry.keyword!r}, {self.entry.mall!r}, "
+                f"score={self.score:.3f}, cost={self.cost})")
+
+def make_candidate(entry, history, last_checked, now, hint_rank=None, scan_mode=None):
+    """관측 이력으로 갱신 후보 생성 (history 는 최근 [(시각, 순위)])"""
+    volatility = rank_volatility(history)
+    age_days = (now - last_checked) / DAY_SECONDS if last_checked else UNCHECKED_AGE_DAYS
+    importance = getattr(entry, "importance", 1.0)
+    return RefreshCandidate(
+        entry, refresh_score(volatility, max(age_days, 0), importance),
+        estimate_check_calls(hint_rank, scan_mode), volatility, age_days
+    )
+
+def prioritize(candidates):
+    """점수 높은 순 정렬 (같으면 호출이 적은 쪽 먼저)"""
+    return sorted(candidates, key=lambda c: (-c.score, c.cost))
+
+def allocate(candidates, budget):
+    """남은 예산 안에서 점수 순으로 갱신할 후보 선택
+
+    예산이 모자란 후보는 건너뛰고 더 싼 다음 후보로 남은 예산을 채웁니다.
+    """
+    chosen = []
+    for candidate in prioritize(candidates):
+        if candidate.cost <= budget:
+            chosen.append(candidate)
+            budget -= candidate.cost
+    return chosen
@@ -0,0 +1,106 @@
+"""
+연관검색어 추출 (여러 페이지 상품명 + 단어/두 단어 빈도)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+쇼핑 검색 결과 여러 페이지를 동시에 받아 상품명을 흘려보내면서
+미리 컴파일한 패턴으로 단어를 나누고 Counter 로 한 단어(unigram)와
+연속 두 단어(bigram) 빈도를 셉니다. 결과는 점수 순으로 정렬해 돌려줍니다.
+"""
+
+import os
+import re
+import asyncio
+from collections import Counter
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+import naver_api
+import rank_engine
+
+RELATED_PAGES = int(os.getenv("RELATED_PAGES", "3"))
+RELATED_LIMIT = 20
+# 두 단어 조합은 한 단어보다 구체적이므로 가중치를 더 줌
+BIGRAM_WEIGHT = 1.5
+MIN_BIGRAM_COUNT = 2
+
+TAG_RE = re.compile(r"<.*?>")
+WORD_RE = re.compile(r"[가-힣a-zA-Z0-9]+")
+
+def fetch_titles(query, pages=None, concurrency=None, fetch_page=None):
+    """쇼핑 검색 결과 여러 페이지를 동시에 받아 페이지 순서대로 상품명 목록 반환"""
+    pages = max(1, min(pages or RELATED_PAGES, len(rank_engine.page_starts())))
+    starts = rank_engine.page_starts()[:pages]
+    fetch_page = fetch_page or naver_api.search_shop_page
+    concurrency = max(1, min(concurrency or rank_engine.DEFAULT_CONCURRENCY, pages))
+
+    async def fetch_all():
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return await asyncio.gather(
+                *(loop.run_in_executor(executor, fetch_page, query, start) for start in starts),
+                return_exceptions=True
+            )
+
+    titles = []
+    for result in asyncio.run(fetch_all()):
+        if isinstance(result, Exception):
+            # 첫 페이지 실패는 호출 측에 알리고, 뒤 페이지 실패는 받은 만큼만 사용
+            if not titles:
+                raise result
+            break
+        titles.extend(item["title"] for item in result.get("items", []))
+    return titles
+
+def count_ngrams(titles, query="", chunk_size=1000):
+    """상품명에서 한 단어/두 단어 빈도 계산 (검색어에 포함된 단어 제외)
+
+    상품명은 chunk_size 개씩 흘려보내며 원시 토큰을 Counter 로 한꺼번에 세고,
+    검색어 제외와 길이 필터는 서로 다른 단어에 대해서만 마지막에 한 번 적용합니다.
+    """
+    original_words = set(WORD_RE.findall(query.lower()))
+    raw_unigrams = Counter()
+    raw_bigrams = Counter()
+    titles = iter(titles)
+    while True:
+        chunk = list(islice(titles, chunk_size))
+        if not chunk:
+            break
+        words_chunk = []
+        pairs_chunk = []
+        for title in chunk:
+            if "<" in title:
+                title = TAG_RE.sub("", title)
+            words = WORD_RE.findall(title)
+            words_chunk.extend(words)
+            pairs_chunk.extend(zip(words, words[1:]))
+        raw_unigrams.update(words_chunk)
+        raw_bigrams.update(pairs_chunk)
+
+    unigrams = Counter({
+        word: count for word, count in raw_unigrams.items()
+        if len(word) >= 2 and word.lower() not in original_words
+    })
+    bigrams = Counter()
+    for (first, second), count in raw_bigrams.items():
+        if first.lower() not in original_words or second.lower() not in original_words:
+            bigrams[f"{first} {second}"] += count
+    return unigrams, bigrams
+
+def rank_suggestions(unigrams, bigrams, limit=RELATED_LIMIT):
+    """빈도를 점수로 바꿔 상위 연관검색어 반환 ([{"keyword", "score", "count"}])"""
+    scored = [
+        {"keyword": word, "score": float(count), "count": count}
+        for word, count in unigrams.items()
+    ]
+    scored.extend(
+        {"keyword": pair, "score": count * BIGRAM_WEIGHT, "count": count}
+        for pair, count in bigrams.items() if count >= MIN_BIGRAM_COUNT
+    )
+    scored.sort(key=lambda s: (-s["score"], s["keyword"]))
+    return scored[:limit]
+
+def get_related_keyword_scores(query, pages=None, limit=RELATED_LIMIT):
+    """검색어의 연관검색어를 점수와 함께 조회"""
+    titles = fetch_titles(query, pages)
+    unigrams, bigrams = count_ngrams(titles, query)
+    return rank_suggestions(unigrams, bigrams, limit)
@@ -0,0 +1,204 @@
+"""
+네이버 API 응답 디스크 캐시 (SQLite)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+엔드포인트 + 정규화된 쿼리 파라미터를 키로 응답 본문을 압축 저장합니다.
+엔드포인트별 TTL 이 지나면 stale 로 보고, stale 허용 구간 안에서는 기존 값을
+바로 돌려주면서 백그라운드에서 갱신합니다. 전체 크기가 CACHE_MAX_MB 를
+넘으면 가장 오래 사용하지 않은 항목부터 지웁니다.
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") != "0"
+CACHE_PATH = os.getenv("CACHE_PATH", "naver_cache.db")
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", "200"))
+# TTL 이 지난 뒤에도 stale 값을 돌려줄 수 있는 시간
+CACHE_STALE_SECONDS = int(os.getenv("CACHE_STALE_SECONDS", "3600"))
+
+# 엔드포인트별 TTL (초) - 쇼핑 순위는 자주 바뀌고 문서 수는 천천히 바뀜
+DEFAULT_TTLS = {
+    "shop": 600,
+    "blog": 3600,
+    "news": 1800,
+    "webkr": 86400,
+    "image": 86400,
+    "ads_volume": 86400,
+}
+DEFAULT_TTL = 600
+
+def endpoint_ttl(endpoint):
+    """엔드포인트 TTL (환경변수 CACHE_TTL_<ENDPOINT> 로 재정의 가능)"""
+    override = os.getenv(f"CACHE_TTL_{endpoint.upper()}")
+    if override:
+        return int(override)
+    return DEFAULT_TTLS.get(endpoint, DEFAULT_TTL)
+
+def normalize_query(query):
+    """캐시 키용 검색어 정규화 (앞뒤 공백 제거, 연속 공백 하나로)"""
+    return " ".join(str(query).split())
+
+def make_cache_key(endpoint, params):
+    """엔드포인트 + 정렬된 파라미터로 캐시 키 생성"""
+    items = []
+    for name in sorted(params):
+        value = params[name]
+        if value is None:
+            continue
+        if name == "query":
+            value = normalize_query(value)
+        items.append(f"{name}={value}")
+    return f"{endpoint}?{'&'.join(items)}"
+
+class ResponseCache:
+    """SQLite 기반 응답 캐시"""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=None, stale_seconds=CACHE_STALE_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes or int(CACHE_MAX_MB * 1024 * 1024)
+        self.stale_seconds = stale_seconds
+        self._local = threading.local()
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " endpoint TEXT NOT NULL,"
+                " body BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, endpoint, params):
+        """(본문 bytes, 저장 후 경과 초) 반환, 없으면 None"""
+        key = make_cache_key(endpoint, params)
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT body, stored_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return zlib.decompress(row[0]), now - row[1]
+
+    def is_fresh(self, endpoint, params, ttl=None):
+        """TTL 안의 항목이 있는지 확인 (접근 시간은 갱신하지 않음)"""
+        ttl = endpoint_ttl(endpoint) if ttl is None else ttl
+        row = self._connect().execute(
+            "SELECT stored_at FROM responses WHERE key = ?", (make_cache_key(endpoint, params),)
+        ).fetchone()
+        return row is not None and time.time() - row[0] <= ttl
+
+    def put(self, endpoint, params, body):
+        """응답 본문 저장 후 필요하면 크기 기준 정리"""
+        key = make_cache_key(endpoint, params)
+        packed = zlib.compress(body)
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO responses (key, endpoint, body, size, stored_at, accessed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (key, endpoint, packed, len(packed), now, now)
+        )
+        self._writes += 1
+        if self._writes % 50 == 0:
+            self.evict()
+
+    def evict(self):
+        """전체 크기가 상한을 넘으면 오래 사용하지 않은 항목부터 삭제 (상한의 90%까지)"""
+        conn = self._connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        self._connect().execute("DELETE FROM responses")
+
+    def _refresh(self, endpoint, params, key, fetch):
+        try:
+            self.put(endpoint, params, fetch())
+        except Exception:
+            # 갱신 실패 시 기존 stale 값 유지
+            pass
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def _schedule_refresh(self, endpoint, params, fetch):
+        key = make_cache_key(endpoint, params)
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._refresher.submit(self._refresh, endpoint, params, key, fetch)
+
+    def fetch(self, endpoint, params, fetch, ttl=None, stale=True):
+        """캐시를 거쳐 본문 bytes 조회 (fresh → 그대로, stale → 반환 후 백그라운드 갱신)
+
+        stale=False 이면 TTL 이 지난 값은 돌려주지 않고 바로 다시 받습니다.
+        ttl=0 이면 캐시를 읽지 않고 항상 새로 받아 저장만 합니다.
+        """
+        ttl = endpoint_ttl(endpoint) if ttl is None else ttl
+        cached = self.get(endpoint, params) if ttl > 0 else None
+        if cached is not None:
+            body, age = cached
+            if age <= ttl:
+                return body
+            if stale and age <= ttl + self.stale_seconds:
+                self._schedule_refresh(endpoint, params, fetch)
+                return body
+        body = fetch()
+        self.put(endpoint, params, body)
+        return body
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_cache():
+    """프로세스 공용 캐시 반환 (CACHE_ENABLED=0 이면 None)"""
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache()
+    return _default_cache
+
+def cached_fetch(endpoint, params, fetch, ttl=None, stale=True):
+    """공용 캐시를 거쳐 fetch() 결과 bytes 반환 (캐시 비활성 시 바로 호출)"""
+    cache = get_cache()
+    if cache is None:
+        return fetch()
+    return cache.fetch(endpoint, params, fetch, ttl, stale)
@@ -0,0 +1,395 @@
+"""
+쇼핑 검색 결과 스냅숏 보관소 (열 단위 + 사전 인코딩 + 메모리 맵)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+순위 조회 중 실제로 받아 온 쇼핑 결과 페이지의 모든 상품을
+(키워드, 시각, 순위, 판매처, 상품 ID, 가격) 행으로 보관합니다. 나중에
+"09:00 에 키워드 Y 에서 판매처 X 는 몇 위였나", "상위 50위를 차지한 판매처는"
+같은 질문은 API 호출 없이 보관소만 읽어 답합니다.
+
+- 행은 메모리에 모았다가 SERP_ARCHIVE_FLUSH_ROWS 개가 쌓이거나 첫 행이 들어온 뒤
+  SERP_ARCHIVE_FLUSH_SECONDS 가 지나면 세그먼트 하나로 씁니다.
+- 한 번의 순위 조회에서 받은 페이지는 같은 조회 번호(scan, 첫 페이지 시각)로
+  묶으므로 페이지가 몇 초에 걸쳐 들어와도 이력에는 한 번의 관측으로 남습니다.
+- 키워드/판매처 문자열은 세그먼트별 사전(zlib 압축)의 번호로 바꾸고, 숫자 열은
+  값 범위에 맞는 가장 좁은 정수형 .npy 로 저장합니다 (상품 1개당 약 20바이트).
+- 읽을 때는 np.load(mmap_mode="r") 로 열 파일을 메모리 맵으로 열어 필요한
+  부분만 읽으므로 몇 달 치 이력도 바로 조회합니다.
+
+SERP_ARCHIVE_DIR 를 지정해야 보관이 켜집니다.
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import atexit
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+
+import numpy as np
+
+import shop_records
+from mall_matcher import MallMatcher
+from response_cache import normalize_query
+
+SERP_ARCHIVE_DIR = os.getenv("SERP_ARCHIVE_DIR", "")
+SERP_ARCHIVE_FLUSH_ROWS = int(os.getenv("SERP_ARCHIVE_FLUSH_ROWS", "50000"))
+# 첫 행이 들어온 뒤 이 시간이 지나면 행 수와 상관없이 기록 (초, 0 이면 끔)
+SERP_ARCHIVE_FLUSH_SECONDS = float(os.getenv("SERP_ARCHIVE_FLUSH_SECONDS", "60"))
+# 같은 키워드의 페이지가 이 간격 안에 이어서 들어오면 같은 조회로 묶음 (초)
+SCAN_WINDOW = float(os.getenv("SERP_ARCHIVE_SCAN_WINDOW", "120"))
+# 특정 시각의 결과를 재구성할 때 이보다 오래된 관측은 쓰지 않음 (초)
+SNAPSHOT_MAX_AGE = float(os.getenv("SERP_ARCHIVE_MAX_AGE", str(24 * 60 * 60)))
+
+# 세그먼트 열 (문자열 열은 사전 번호로 저장, scan 은 조회 첫 페이지 시각)
+COLUMNS = ("keyword", "ts", "scan", "rank", "mall", "product", "price")
+SEGMENT_META = "meta.json"
+SEGMENT_DICTS = "dicts.json.z"
+
+def product_id(item):
+    """상품 고유 번호 (productId, 없으면 link 해시)"""
+    value = item.get("productId")
+    if value and str(value).isdigit():
+        return int(value)
+    digest = hashlib.blake2b(str(item.get("link", "")).encode("utf-8"), digest_size=8).digest()
+    # 양수 범위로 맞춰 productId 와 같은 int64 열에 저장
+    return int.from_bytes(digest, "big") >> 1
+
+def parse_price(value):
+    """lprice 문자열을 정수로 변환 (없으면 0)"""
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+def narrow(values):
+    """값 범위에 맞는 가장 좁은 정수형 배열로 변환"""
+    values = np.asarray(values, dtype="int64")
+    high = int(values.max()) if len(values) else 0
+    low = int(values.min()) if len(values) else 0
+    for dtype in ("int8", "int16", "int32") if low < 0 else ("uint8", "uint16", "uint32"):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
+
+class Segment:
+    """보관소 세그먼트 하나 (메모리 맵 열 + 문자열 사전)"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, SEGMENT_META), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self._dicts = None
+        self._keyword_index = None
+        self._columns = {}
+
+    @property
+    def min_ts(self):
+        return self.meta["min_ts"]
+
+    @property
+    def max_ts(self):
+        return self.meta["max_ts"]
+
+    def dicts(self):
+        if self._dicts is None:
+            with open(os.path.join(self.path, SEGMENT_DICTS), "rb") as f:
+                self._dicts = json.loads(zlib.decompress(f.read()))
+        return self._dicts
+
+    def column(self, name):
+        if name not in self._columns:
+            self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return self._columns[name]
+
+    def keyword_id(self, keyword):
+        """세그먼트 사전의 키워드 번호 (없으면 None)"""
+        if self._keyword_index is None:
+            self._keyword_index = {k: i for i, k in enumerate(self.dicts()["keyword"])}
+        return self._keyword_index.get(keyword)
+
+    def has_column(self, name):
+        return os.path.exists(os.path.join(self.path, f"{name}.npy"))
+
+    def rows(self, keyword, since=None, until=None):
+        """키워드의 (시각, 조회 번호, 순위, 판매처명, 상품 ID, 가격) 열 (시각 범위 필터)"""
+        keyword_id = self.keyword_id(keyword)
+        if keyword_id is None:
+            return None
+        # 세그먼트 안은 키워드 번호 순으로 정렬되어 있어 이분 탐색으로 범위만 읽음
+        keywords = self.column("keyword")
+        lo = int(np.searchsorted(keywords, keyword_id, side="left"))
+        hi = int(np.searchsorted(keywords, keyword_id, side="right"))
+        ts = np.asarray(self.column("ts")[lo:hi], dtype="int64")
+        mask = np.ones(hi - lo, dtype=bool)
+        if since is not None:
+            mask &= ts >= since
+        if until is not None:
+            mask &= ts <= until
+        malls = np.asarray(self.dicts()["mall"], dtype=object)
+        # scan 열이 없는 예전 세그먼트는 페이지 시각을 조회 번호로 사용
+        scan = np.asarray(self.column("scan")[lo:hi], dtype="int64") if self.has_column("scan") else ts
+        return {
+            "ts": ts[mask],
+            "scan": scan[mask],
+            "rank": np.asarray(self.column("rank")[lo:hi], dtype="int64")[mask],
+            "mall": malls[np.asarray(self.column("mall")[lo:hi], dtype="int64")[mask]],
+            "product": np.asarray(self.column("product")[lo:hi], dtype="int64")[mask],
+            "price": np.asarray(self.column("price")[lo:hi], dtype="int64")[mask],
+        }
+
+def concat_rows(parts):
+    """세그먼트별 행 묶음을 하나로 합침"""
+    parts = [p for p in parts if p is not None and len(p["ts"])]
+    if not parts:
+        return {"ts": np.zeros(0, "int64"), "scan": np.zeros(0, "int64"), "rank": np.zeros(0, "int64"),
+                "mall": np.zeros(0, object), "product": np.zeros(0, "int64"),
+                "price": np.zeros(0, "int64")}
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+def latest_per_rank(rows):
+    """순위 자리마다 가장 최근 관측 한 행씩 남김 (순위 오름차순)"""
+    if not len(rows["ts"]):
+        return rows
+    order = np.lexsort((rows["ts"], rows["rank"]))
+    ranks = rows["rank"][order]
+    # 같은 순위 묶음의 마지막(가장 최근) 위치
+    last = np.flatnonzero(np.append(ranks[1:] != ranks[:-1], True))
+    picked = order[last]
+    return {name: values[picked] for name, values in rows.items()}
+
+class SerpArchive:
+    """쇼핑 결과 스냅숏 보관소"""
+
+    def __init__(self, path=None, flush_rows=SERP_ARCHIVE_FLUSH_ROWS,
+                 flush_seconds=SERP_ARCHIVE_FLUSH_SECONDS):
+        self.path = path or SERP_ARCHIVE_DIR
+        self.flush_rows = max(1, flush_rows)
+        self.flush_seconds = flush_seconds
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._buffer = {name: [] for name in COLUMNS}
+        self._keyword_ids = {}
+        self._mall_ids = {}
+        self._segments = {}
+        self._sequence = 0
+        # 키워드 → (조회 번호, 마지막 페이지 시각, 받은 start 집합)
+        self._scans = {}
+        self._timer = None
+
+    # 쓰기
+
+    def _scan_id(self, keyword, start, ts):
+        """페이지가 속한 조회 번호 - 이미 받은 start 가 다시 오거나 간격이 길면 새 조회"""
+        scan = self._scans.get(keyword)
+        if scan is None or start in scan[2] or ts - scan[1] > SCAN_WINDOW:
+            scan = (ts, ts, set())
+        scan[2].add(start)
+        self._scans[keyword] = (scan[0], ts, scan[2])
+        return scan[0]
+
+    def add_page(self, keyword, start, result, fetched_at=None):
+        """받아 온 결과 페이지 한 장의 모든 상품을 보관 대기열에 추가"""
+        items = result.get("items", [])
+        if not items:
+            return
+        ts = int(fetched_at or time.time())
+        keyword = normalize_query(keyword)
+        with self._lock:
+            keyword_id = self._keyword_ids.setdefault(keyword, len(self._keyword_ids))
+            scan = self._scan_id(keyword, start, ts)
+            buffer = self._buffer
+            if not buffer["ts"] and self.flush_seconds > 0:
+                # 오래 떠 있는 프로세스에서도 행이 메모리에만 머물지 않도록 시간으로도 기록
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            for offset, item in enumerate(items):
+                mall = item.get("mallName") or ""
+                buffer["keyword"].append(keyword_id)
+                buffer["ts"].append(ts)
+                buffer["scan"].append(scan)
+                buffer["rank"].append(start + offset)
+                buffer["mall"].append(self._mall_ids.setdefault(mall, len(self._mall_ids)))
+                buffer["product"].append(product_id(item))
+                buffer["price"].append(parse_price(item.get("lprice")))
+            full = len(buffer["ts"]) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def add_body(self, keyword, start, body, fetched_at=None):
+        """검색 API 응답 본문 bytes 를 그대로 받아 보관"""
+        self.add_page(keyword, start, shop_records.decode_page(body), fetched_at)
+
+    def flush(self):
+        """대기 중인 행을 새 세그먼트로 기록"""
+        with self._lock:
+            if not self._buffer["ts"]:
+                return None
+            buffer, keyword_ids, mall_ids = self._buffer, self._keyword_ids, self._mall_ids
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._buffer = {name: [] for name in COLUMNS}
+            self._keyword_ids = {}
+            self._mall_ids = {}
+            self._sequence += 1
+            sequence = self._sequence
+        ts = np.asarray(buffer["ts"], dtype="int64")
+        name = f"{int(ts.min())}-{os.getpid()}-{sequence}"
+        final_path = os.path.join(self.path, name)
+        temp_path = os.path.join(self.path, f".{name}.tmp")
+        os.makedirs(temp_path, exist_ok=True)
+
+        # 키워드 → 시각 → 순위 순으로 정렬해 두면 키워드 범위를 이분 탐색으로 찾음
+        order = np.lexsort((buffer["rank"], ts, buffer["keyword"]))
+        np.save(os.path.join(temp_path, "keyword.npy"), narrow(buffer["keyword"])[order])
+        np.save(os.path.join(temp_path, "ts.npy"), ts.astype("uint32")[order])
+        np.save(os.path.join(temp_path, "scan.npy"), np.asarray(buffer["scan"], "uint32")[order])
+        np.save(os.path.join(temp_path, "rank.npy"), narrow(buffer["rank"])[order])
+        np.save(os.path.join(temp_path, "mall.npy"), narrow(buffer["mall"])[order])
+        np.save(os.path.join(temp_path, "product.npy"), np.asarray(buffer["product"], "int64")[order])
+        np.save(os.path.join(temp_path, "price.npy"), narrow(buffer["price"])[order])
+        dicts = {"keyword": list(keyword_ids), "mall": list(mall_ids)}
+        with open(os.path.join(temp_path, SEGMENT_DICTS), "wb") as f:
+            f.write(zlib.compress(json.dumps(dicts, ensure_ascii=False).encode("utf-8")))
+        meta = {"rows": int(len(ts)), "min_ts": int(ts.min()), "max_ts": int(ts.max())}
+        with open(os.path.join(temp_path, SEGMENT_META), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        # 완성된 세그먼트만 보이도록 마지막에 이름을 바꿈
+        os.replace(temp_path, final_path)
+        return final_path
+
+    # 읽기
+
+    def segments(self, since=None, until=None):
+        """시각 범위와 겹치는 세그먼트 목록"""
+        names = sorted(n for n in os.listdir(self.path) if not n.startswith("."))
+        result = []
+        for name in names:
+            segment = self._segments.get(name)
+            if segment is None:
+                try:
+                    segment = Segment(os.path.join(self.path, name))
+                except (OSError, ValueError):
+                    continue
+                self._segments[name] = segment
+            if since is not None and segment.max_ts < since:
+                continue
+            if until is not None and segment.min_ts > until:
+                continue
+            result.append(segment)
+        return result
+
+    def rows(self, keyword, since=None, until=None):
+        """키워드의 보관 행 (세그먼트 전체에서 시각 범위로 모음)"""
+        keyword = normalize_query(keyword)
+        return concat_rows(seg.rows(keyword, since, until) for seg in self.segments(since, until))
+
+    def snapshot(self, keyword, at=None, max_age=SNAPSHOT_MAX_AGE):
+        """at 시각 기준 결과 재구성 - 순위 자리마다 at 이전 가장 최근 관측"""
+        at = int(at or time.time())
+        return latest_per_rank(self.rows(keyword, at - max_age, at))
+
+    def mall_rank_at(self, keyword, mall_name, at=None, max_age=SNAPSHOT_MAX_AGE):
+        """at 시각에 판매처의 최고 순위 상품 (rank, product, price, ts) (없으면 None)"""
+        rows = self.snapshot(keyword, at, max_age)
+        matcher = MallMatcher([mall_name])
+        for i in range(len(rows["rank"])):
+            if matcher.match(rows["mall"][i]):
+                return {"rank": int(rows["rank"][i]), "mallName": rows["mall"][i],
+                        "product_id": int(rows["product"][i]), "price": int(rows["price"][i]),
+                        "checked_at": int(rows["ts"][i])}
+        return None
+
+    def top_malls(self, keyword, top_n=50, at=None, max_age=SNAPSHOT_MAX_AGE):
+        """at 시각 상위 top_n 위 안의 판매처별 (판매처, 상품 수, 최고 순위) - 상품 수 많은 순"""
+        rows = self.snapshot(keyword, at, max_age)
+        in_top = rows["rank"] <= top_n
+        malls, first, counts = np.unique(rows["mall"][in_top].astype(str), return_index=True,
+                                         return_counts=True)
+        best = rows["rank"][in_top][first]
+        order = np.lexsort((best, -counts))
+        return [(str(malls[i]), int(counts[i]), int(best[i])) for i in order]
+
+    def rank_history(self, keyword, mall_name, since=None, until=None):
+        """판매처 최고 순위 이력 [(시각, 순위)] - 조회(scan)마다 한 점, 시각은 조회 시작 시각"""
+        rows = self.rows(keyword, since, until)
+        matcher = MallMatcher([mall_name])
+        matches = {name: bool(matcher.match(name)) for name in set(rows["mall"])}
+        mask = np.fromiter((matches[name] for name in rows["mall"]), dtype=bool,
+                           count=len(rows["mall"]))
+        scans, ranks = rows["scan"][mask], rows["rank"][mask]
+        if not len(scans):
+            return []
+        # 조회마다 가장 앞 순위 (한 조회의 페이지가 여러 초에 걸쳐 기록되어도 한 점)
+        order = np.lexsort((ranks, scans))
+        scans, ranks = scans[order], ranks[order]
+        first = np.flatnonzero(np.insert(scans[1:] != scans[:-1], 0, True))
+        return [(int(scans[i]), int(ranks[i])) for i in first]
+
+_default_archive = None
+_default_lock = threading.Lock()
+
+def get_archive():
+    """프로세스 공용 보관소 반환 (SERP_ARCHIVE_DIR 가 비어 있으면 None)"""
+    global _default_archive
+    if not SERP_ARCHIVE_DIR:
+        return None
+    if _default_archive is None:
+        with _default_lock:
+            if _default_archive is None:
+                _default_archive = SerpArchive()
+                # 종료 시 남은 행 기록
+                atexit.register(_default_archive.flush)
+    return _default_archive
+
+def parse_time(text):
+    """명령줄 시각 인자 (YYYY-MM-DD HH:MM 또는 epoch 초)"""
+    if text is None:
+        return None
+    if text.isdigit():
+        return int(text)
+    return int(datetime.fromisoformat(text).timestamp())
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="쇼핑 검색 결과 보관소 조회")
+    parser.add_argument("--dir", default=SERP_ARCHIVE_DIR or "serp_archive", help="보관소 경로")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rank = subparsers.add_parser("rank", help="특정 시각 판매처 최고 순위")
+    rank.add_argument("keyword")
+    rank.add_argument("mall")
+    rank.add_argument("--at", default=None, help="기준 시각 (기본: 지금)")
+    top = subparsers.add_parser("top", help="특정 시각 상위권 판매처")
+    top.add_argument("keyword")
+    top.add_argument("-n", type=int, default=50, help="상위 N위")
+    top.add_argument("--at", default=None, help="기준 시각 (기본: 지금)")
+    history = subparsers.add_parser("history", help="판매처 순위 이력")
+    history.add_argument("keyword")
+    history.add_argument("mall")
+    history.add_argument("--since", default=None)
+    history.add_argument("--until", default=None)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    archive = SerpArchive(args.dir)
+    if args.command == "rank":
+        result = archive.mall_rank_at(args.keyword, args.mall, parse_time(args.at))
+        print(json.dumps(result, ensure_ascii=False))
+    elif args.command == "top":
+        for mall, count, best in archive.top_malls(args.keyword, args.n, parse_time(args.at)):
+            print(f"{best:4d}위  {count:3d}개  {mall}")
+    else:
+        for ts, rank in archive.rank_history(args.keyword, args.mall,
+                                             parse_time(args.since), parse_time(args.until)):
+            print(f"{datetime.fromtimestamp(ts).isoformat(timespec='seconds')}  {rank}위")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
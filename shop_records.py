@@ -0,0 +1,96 @@
+"""
+쇼핑 검색 결과 필요한 필드만 담는 가벼운 레코드
+Copyright ⓒ 2025 happy. All rights reserved.
+
+순위 계산에는 상품마다 title, lprice, link, mallName, productId 만 쓰므로
+응답 bytes 를 바로 파싱해 이 필드만 __slots__ 레코드로 옮기고 나머지
+필드가 담긴 dict 는 곧바로 버립니다. 수천 페이지를 메모리에 들고 있는
+여러 판매처 조회/보관 작업에서 상품당 메모리가 크게 줄어듭니다.
+
+orjson 이 설치되어 있으면 파싱에 사용하고, 없으면 표준 json 을 씁니다.
+레코드는 get()/[] 를 지원해 기존 dict 를 쓰던 코드가 그대로 동작합니다.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ITEM_FIELDS = ("title", "lprice", "link", "mallName", "productId")
+
+def loads(body):
+    """응답 본문 bytes/str 파싱 (orjson 이 있으면 사용)"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+class ShopItem:
+    """쇼핑 결과 상품 한 개 (순위 계산에 쓰는 필드만)"""
+
+    __slots__ = ITEM_FIELDS
+
+    def __init__(self, title=None, lprice=None, link=None, mallName=None, productId=None):
+        self.title = title
+        self.lprice = lprice
+        self.link = link
+        self.mallName = mallName
+        self.productId = productId
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None) if name in ITEM_FIELDS else None
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        if name not in ITEM_FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in ITEM_FIELDS}
+
+    def __repr__(self):
+        return f"ShopItem({self.productId!r}, {self.mallName!r})"
+
+class ShopPage:
+    """쇼핑 결과 한 페이지 (total, start, display, items)"""
+
+    __slots__ = ("total", "start", "display", "items")
+
+    def __init__(self, total=0, start=1, display=0, items=()):
+        self.total = total
+        self.start = start
+        self.display = display
+        self.items = list(items)
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None) if name in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def to_dict(self):
+        """JSON 으로 저장할 수 있는 dict (검색 API 응답과 같은 모양)"""
+        return {"total": self.total, "start": self.start, "display": self.display,
+                "items": [item.to_dict() for item in self.items]}
+
+def project_page(data):
+    """파싱된 응답 dict 에서 필요한 필드만 옮긴 ShopPage 생성"""
+    items = [
+        ShopItem(item.get("title"), item.get("lprice"), item.get("link"),
+                 item.get("mallName"), item.get("productId"))
+        for item in data.get("items", ())
+    ]
+    return ShopPage(data.get("total", 0), data.get("start", 1), data.get("display", len(items)), items)
+
+def decode_page(body):
+    """응답 본문 bytes 를 ShopPage 로 디코딩"""
+    return project_page(loads(body))
+
+def as_dict(page):
+    """ShopPage 또는 dict 결과를 JSON 저장용 dict 로 변환"""
+    return page.to_dict() if isinstance(page, ShopPage) else page
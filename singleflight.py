@@ -0,0 +1,62 @@
+"""
+동일 요청 합치기 (single-flight)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+같은 키의 요청이 이미 진행 중이면 새로 호출하지 않고 그 결과를 함께 기다립니다.
+Streamlit 의 여러 세션/탭과 엔진의 동시 요청이 모두 한 프로세스의 스레드에서
+실행되므로 스레드 기반으로 구현합니다. 공유된 결과 객체는 수정하지 않아야 합니다.
+"""
+
+import threading
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """키별로 진행 중인 호출 하나를 여러 호출자가 공유"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """key 로 fn() 을 실행 (진행 중인 같은 key 가 있으면 그 결과를 공유)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        """현재 진행 중인 키 개수"""
+        with self._lock:
+            return len(self._calls)
+
+_default_group = SingleFlight()
+
+def do(key, fn):
+    """프로세스 공용 SingleFlight 로 실행"""
+    return _default_group.do(key, fn)
@@ -6,27 +6,25 @@ Copyright ⓒ 2025 happy. All rights reserved.
 import streamlit as st
 import os
 import uuid
-import json
 import urllib.request
-import urllib.parse
-import re
-import requests
-import time
-import hmac
-import hashlib
-import base64
-from datetime import datetime
 from dotenv import load_dotenv
 
+import credentials
+import job_journal
+import job_planner
+import keyword_crawler
+import near_duplicates
+import naver_ads
+import quota
+import rank_engine
+import related_pipeline
+import vertical_probe
+import volume_estimator
+from response_cache import normalize_query
+
 # Load environment variables
 load_dotenv()
 
-# API 설정
-client_id = os.getenv("NAVER_CLIENT_ID")
-client_secret = os.getenv("NAVER_CLIENT_SECRET")
-naver_ad_access_license = os.getenv("NAVER_AD_ACCESS_LICENSE")
-naver_ad_secret_key = os.getenv("NAVER_AD_SECRET_KEY")
-gemini_api_key = os.getenv("GEMINI_API_KEY")
 UUID_FILE = "user_uuid.txt"
 
 def get_user_id():
@@ -47,287 +45,115 @@ def get_public_ip():
     except:
         return "Unknown"
 
+def get_ads_search_volumes(keywords):
+    """네이버 광고 API 로 실제 월간 검색수 조회 (실패 시 빈 dict)"""
+    client = naver_ads.get_client()
+    if not client.is_configured():
+        return {}
+    try:
+        return client.get_search_volumes(keywords)
+    except Exception as e:
+        st.warning(f"광고 API 조회 실패, 검색 API 추정으로 대체합니다: {e}")
+        return {}
+
 def get_keyword_search_volume(keywords):
-    """키워드 검색수 조회 - 검색 API 기반 고도화된 추정"""
+    """키워드 검색수 조회 - 광고 API 우선, 실패/누락 키워드는 검색 API 기반 추정"""
     try:
-        results = []
-        
-        # 사용자에게 추정 방식 안내
-        st.info("📊 **네이버 검색 API 기반 고도화된 추정 시스템**을 사용합니다.\n" +
-                "• 쇼핑(40%) + 블로그(40%) + 뉴스(20%) 가중 평균\n" +
-                "• 업계 표준 PC(35%)/모바일(65%) 비율 적용\n" +
-                "• 경쟁도 분석 및 검색량 보정 알고리즘")
-        
-        # 각 키워드별 처리
-        progress_bar = st.progress(0)
-        total_keywords = len(keywords)
-        
-        for idx, keyword in enumerate(keywords):
-            # 진행률 업데이트
-            progress = (idx + 1) / total_keywords
-            progress_bar.progress(progress, f"분석 중: {keyword} ({idx + 1}/{total_keywords})")
+        results = {}
+        
+        # 1차: 광고 API (키워드 5개당 요청 1회)
+        for keyword, volume in get_ads_search_volumes(keywords).items():
+            if volume:
+                results[keyword] = {
+                    'keyword': keyword,
+                    'monthly_pc_qc': volume['monthly_pc_qc'],
+                    'monthly_mobile_qc': volume['monthly_mobile_qc'],
+                    'competition': volume['competition'],
+                    'source': 'ads',
+                    'data_sources': {}
+                }
+        
+        fallback_keywords = [k for k in keywords if k not in results]
+        if fallback_keywords:
+            # 광고 API 가 답하지 못한 키워드만 검색 API 쿼터로 계획
+            try:
+                job_planner.plan_volume_job(fallback_keywords)
+            except (quota.QuotaExceeded, credentials.MissingCredentials) as e:
+                st.error(f"⚠️ {e}")
+                return [results[k] for k in keywords if k in results]
             
-            result = get_enhanced_search_volume_estimation(keyword)
-            if result:
-                results.append(result)
+            # 사용자에게 추정 방식 안내
+            st.info("📊 **네이버 검색 API 기반 고도화된 추정 시스템**을 사용합니다.\n" +
+                    "• 쇼핑(40%) + 블로그(40%) + 뉴스(20%) 가중 평균\n" +
+                    "• 업계 표준 PC(35%)/모바일(65%) 비율 적용\n" +
+                    "• 경쟁도 분석 및 검색량 보정 알고리즘")
             
-            time.sleep(0.2)  # API 호출 간격
-        
-        progress_bar.empty()
-        return results
+            progress_bar = st.progress(0)
+            total_keywords = len(fallback_keywords)
+            done = {"keywords": 0}
+            
+            def on_keyword(keyword, totals):
+                # 진행률 업데이트
+                done["keywords"] += 1
+                progress = done["keywords"] / total_keywords
+                progress_bar.progress(progress, f"분석 중: {keyword} ({done['keywords']}/{total_keywords})")
+            
+            # 2차: 모든 키워드 × 버티컬의 결과 수(total)만 동시 조회
+            all_totals = vertical_probe.probe_counts(fallback_keywords, on_keyword=on_keyword)
+            
+            # 모든 키워드의 점수, PC/모바일 분할, 경쟁도를 열 단위로 한 번에 계산
+            estimates = volume_estimator.estimate_volumes(volume_estimator.totals_frame(all_totals))
+            for result in volume_estimator.to_results(estimates):
+                result['source'] = 'estimate'
+                results[result['keyword']] = result
+            
+            progress_bar.empty()
+        return [results[k] for k in keywords if k in results]
         
     except Exception as e:
         st.error(f"검색수 추정 중 오류 발생: {str(e)}")
         return []
 
-def get_enhanced_search_volume_estimation(keyword):
-    """고도화된 검색수 추정 알고리즘"""
-    try:
-        # 네이버 검색 APIs로 종합 데이터 수집
-        encText = urllib.parse.quote(keyword)
-        search_data = {
-            'shop_total': 0,
-            'blog_total': 0,
-            'news_total': 0,
-            'web_total': 0,
-            'image_total': 0
-        }
-        
-        # 1. 네이버 쇼핑 검색 (상업적 가치 높음)
-        try:
-            url = f"https://openapi.naver.com/v1/search/shop.json?query={encText}&display=100"
-            request = urllib.request.Request(url)
-            request.add_header("X-Naver-Client-Id", client_id)
-            request.add_header("X-Naver-Client-Secret", client_secret)
-            response = urllib.request.urlopen(request)
-            result = json.loads(response.read())
-            search_data['shop_total'] = min(result.get('total', 0), 1000000)
-        except:
-            search_data['shop_total'] = 0
-        
-        # 2. 네이버 블로그 검색 (관심도 높음)
-        try:
-            url = f"https://openapi.naver.com/v1/search/blog.json?query={encText}&display=100"
-            request = urllib.request.Request(url)
-            request.add_header("X-Naver-Client-Id", client_id)
-            request.add_header("X-Naver-Client-Secret", client_secret)
-            response = urllib.request.urlopen(request)
-            result = json.loads(response.read())
-            search_data['blog_total'] = min(result.get('total', 0), 1000000)
-        except:
-            search_data['blog_total'] = 0
-        
-        # 3. 네이버 뉴스 검색 (트렌드 반영)
-        try:
-            url = f"https://openapi.naver.com/v1/search/news.json?query={encText}&display=100"
-            request = urllib.request.Request(url)
-            request.add_header("X-Naver-Client-Id", client_id)
-            request.add_header("X-Naver-Client-Secret", client_secret)
-            response = urllib.request.urlopen(request)
-            result = json.loads(response.read())
-            search_data['news_total'] = min(result.get('total', 0), 1000000)
-        except:
-            search_data['news_total'] = 0
-        
-        # 4. 웹문서 검색 (일반적 관심도)
-        try:
-            url = f"https://openapi.naver.com/v1/search/webkr.json?query={encText}&display=100"
-            request = urllib.request.Request(url)
-            request.add_header("X-Naver-Client-Id", client_id)
-            request.add_header("X-Naver-Client-Secret", client_secret)
-            response = urllib.request.urlopen(request)
-            result = json.loads(response.read())
-            search_data['web_total'] = min(result.get('total', 0), 1000000)
-        except:
-            search_data['web_total'] = 0
-        
-        # 5. 이미지 검색 (시각적 관심도)
-        try:
-            url = f"https://openapi.naver.com/v1/search/image.json?query={encText}&display=100"
-            request = urllib.request.Request(url)
-            request.add_header("X-Naver-Client-Id", client_id)
-            request.add_header("X-Naver-Client-Secret", client_secret)
-            response = urllib.request.urlopen(request)
-            result = json.loads(response.read())
-            search_data['image_total'] = min(result.get('total', 0), 1000000)
-        except:
-            search_data['image_total'] = 0
-        
-        # 고도화된 검색수 추정 알고리즘
-        # 가중치: 쇼핑(30%) + 블로그(25%) + 웹(20%) + 뉴스(15%) + 이미지(10%)
-        weighted_score = (
-            search_data['shop_total'] * 0.30 +
-            search_data['blog_total'] * 0.25 +
-            search_data['web_total'] * 0.20 +
-            search_data['news_total'] * 0.15 +
-            search_data['image_total'] * 0.10
-        )
-        
-        # 키워드 타입별 보정 계수
-        # 한글 키워드 vs 영문 키워드
-        korean_chars = len([c for c in keyword if ord(c) >= 0xAC00 and ord(c) <= 0xD7A3])
-        if korean_chars > 0:
-            correction_factor = 1.2  # 한글 키워드는 검색량이 높은 편
-        else:
-            correction_factor = 0.8  # 영문 키워드는 상대적으로 낮음
-        
-        # 키워드 길이별 보정
-        if len(keyword) <= 2:
-            length_factor = 1.5  # 짧은 키워드는 검색량 높음
-        elif len(keyword) <= 4:
-            length_factor = 1.2
-        elif len(keyword) <= 6:
-            length_factor = 1.0
-        else:
-            length_factor = 0.8  # 긴 키워드는 검색량 낮음
-        
-        # 최종 월간 검색수 추정
-        base_monthly = weighted_score * correction_factor * length_factor * 0.12
-        estimated_monthly = max(min(int(base_monthly), 999999), 50)
-        
-        # PC/모바일 분할 (업계 표준)
-        # 키워드 특성에 따른 동적 분할
-        if any(word in keyword for word in ['게임', '앱', '모바일', '폰', '스마트']):
-            mobile_ratio = 0.75  # 모바일 친화적 키워드
-            pc_ratio = 0.25
-        elif any(word in keyword for word in ['업무', '오피스', '작업', '개발', 'PC']):
-            mobile_ratio = 0.45  # PC 친화적 키워드
-            pc_ratio = 0.55
-        else:
-            mobile_ratio = 0.65  # 일반적인 비율
-            pc_ratio = 0.35
-        
-        estimated_mobile = int(estimated_monthly * mobile_ratio)
-        estimated_pc = int(estimated_monthly * pc_ratio)
-        
-        # 경쟁도 분석 (다차원적)
-        total_results = sum(search_data.values())
-        if total_results > 100000:
-            competition = "높음"
-        elif total_results > 20000:
-            competition = "보통"
-        else:
-            competition = "낮음"
-        
-        # 상업적 경쟁도 추가 분석
-        commercial_ratio = search_data['shop_total'] / max(total_results, 1)
-        if commercial_ratio > 0.4:
-            competition += "(상업적)"
-        elif commercial_ratio > 0.2:
-            competition += "(일반)"
-        else:
-            competition += "(정보성)"
-        
-        return {
-            'keyword': keyword,
-            'monthly_pc_qc': estimated_pc,
-            'monthly_mobile_qc': estimated_mobile,
-            'competition': competition,
-            'data_sources': {
-                'shop': search_data['shop_total'],
-                'blog': search_data['blog_total'],
-                'web': search_data['web_total'],
-                'news': search_data['news_total'],
-                'image': search_data['image_total']
-            }
-        }
-        
-    except Exception as e:
-        return {
-            'keyword': keyword,
-            'monthly_pc_qc': 0,
-            'monthly_mobile_qc': 0,
-            'competition': '오류',
-            'data_sources': {}
-        }
-
-def get_related_keywords(query):
+def get_related_keywords(query, pages=None):
     """네이버에서 연관검색어 조회"""
     try:
-        encText = urllib.parse.quote(query)
-        url = f"https://openapi.naver.com/v1/search/shop.json?query={encText}&display=100"
-        
-        request = urllib.request.Request(url)
-        request.add_header("X-Naver-Client-Id", client_id)
-        request.add_header("X-Naver-Client-Secret", client_secret)
-        response = urllib.request.urlopen(request)
-        result = json.loads(response.read())
-        
-        # 상품 제목에서 키워드 추출
-        titles = [re.sub(r"<.*?>", "", item["title"]) for item in result.get("items", [])]
-        
-        # 키워드 분석 및 연관검색어 생성
-        all_words = []
-        for title in titles:
-            # 공백과 특수문자로 분리
-            words = re.findall(r'[가-힣a-zA-Z0-9]+', title)
-            all_words.extend(words)
-        
-        # 단어 빈도 계산 (원래 검색어 제외)
-        word_freq = {}
-        original_words = set(re.findall(r'[가-힣a-zA-Z0-9]+', query.lower()))
-        
-        for word in all_words:
-            word_lower = word.lower()
-            if len(word) >= 2 and word_lower not in original_words:
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # 빈도순으로 정렬하여 상위 20개 반환
-        related_keywords = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:20]
-        
-        return [keyword for keyword, freq in related_keywords]
+        # 여러 페이지 상품명에서 한 단어/두 단어 빈도를 세어 점수순 상위 20개 반환
+        suggestions = related_pipeline.get_related_keyword_scores(query, pages)
+        return [s["keyword"] for s in suggestions]
         
     except Exception as e:
         st.error(f"연관검색어 조회 중 오류 발생: {e}")
         return []
 
-def get_top_ranked_product_by_mall(keyword, mall_name, progress_callback=None):
-    """네이버 쇼핑에서 특정 쇼핑몰의 최고 순위 상품 검색"""
-    encText = urllib.parse.quote(keyword)
-    seen_titles = set()
-    best_product = None
-    
-    # 1000개 상품까지 검색 (10페이지)
-    for page in range(10):
-        start = page * 100 + 1
-        url = f"https://openapi.naver.com/v1/search/shop.json?query={encText}&display=100&start={start}"
+def show_rank_result(keyword, result, checked_depth=None, slots=None):
+    """순위 조회 결과 한 건 표시
+
+    checked_depth 는 조회가 중간에 멈췄을 때 확인한 깊이, slots 는 판매처 자리 수
+    {"items", "groups", "depth"} 입니다.
+    """
+    if slots:
+        st.caption(f"📦 {keyword} - 상위 {slots['depth']}위 중 판매처 상품 {slots['items']}개, "
+                   f"유사 상품을 하나로 치면 {slots['groups']}자리")
+    if result:
+        st.success(f"✅ **{keyword}** - {result['rank']}위 발견!")
+        
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            st.write(f"**상품명:** {result['title']}")
+            st.write(f"**순위:** {result['rank']}위")
+            st.write(f"**가격:** {int(result['price']):,}원")
+            st.write(f"**쇼핑몰:** {result['mallName']}")
         
-        try:
-            request = urllib.request.Request(url)
-            request.add_header("X-Naver-Client-Id", client_id)
-            request.add_header("X-Naver-Client-Secret", client_secret)
-            response = urllib.request.urlopen(request)
-            result = json.loads(response.read())
-            
-            # 진행률 업데이트
-            if progress_callback:
-                progress = int((page + 1) / 10 * 100)
-                progress_callback(progress)
-            
-            for idx, item in enumerate(result.get("items", []), start=1):
-                if item.get("mallName") and mall_name in item["mallName"]:
-                    title_clean = re.sub(r"<.*?>", "", item["title"])
-                    if title_clean in seen_titles:
-                        continue
-                    seen_titles.add(title_clean)
-                    
-                    rank = start + idx - 1
-                    product = {
-                        "rank": rank,
-                        "title": title_clean,
-                        "price": item["lprice"],
-                        "link": item["link"],
-                        "mallName": item["mallName"]
-                    }
-                    
-                    if not best_product or rank < best_product["rank"]:
-                        best_product = product
-                        
-        except Exception as e:
-            st.error(f"API 요청 오류: {e}")
-            break
-    
-    return best_product
+        with col2:
+            st.link_button("🛒 상품 보기", result['link'])
+        
+        st.markdown("---")
+    elif checked_depth is not None:
+        st.warning(f"⚠️ **{keyword}** - 조회 중단: 상위 {checked_depth}위까지만 확인 (결과 불완전)")
+        st.markdown("---")
+    else:
+        st.error(f"❌ **{keyword}** - 검색 결과 없음")
+        st.markdown("---")
 
 def main():
     """메인 Streamlit 애플리케이션"""
@@ -347,6 +173,9 @@ def main():
         st.header("📊 정보")
         st.info(f"사용자 ID: {get_user_id()[:8]}...")
         st.info(f"IP 주소: {get_public_ip()}")
+        pool = credentials.get_pool()
+        st.info(f"오늘 API 사용량: {pool.used_quota():,} / {pool.daily_quota():,}회 "
+                f"(인증키 {len(pool)}개)")
         st.markdown("---")
         st.markdown("**기능:**")
         st.markdown("• **순위 확인**: 특정 쇼핑몰의 상품 순위 검색")
@@ -396,6 +225,22 @@ def rank_checker_tab():
             help="찾고자 하는 쇼핑몰 이름을 입력하세요"
         )
         
+        # 조회 깊이 (최고 순위가 확정되면 남은 페이지는 조회하지 않음)
+        # RANK_MAX_DEPTH 가 100 단위가 아니어도(예: 50, 250) 선택지에 넣어 기본값으로 사용
+        default_depth = max(1, min(rank_engine.DEFAULT_MAX_DEPTH, rank_engine.MAX_RANK))
+        max_depth = st.select_slider(
+            "조회 깊이 (상위 N위까지)",
+            options=sorted(set(range(100, rank_engine.MAX_RANK + 1, 100)) | {default_depth}),
+            value=default_depth,
+            help="깊이를 줄이면 API 호출 수와 대기 시간이 줄어듭니다"
+        )
+        
+        # 유사 상품 묶기 (조회 깊이까지 모든 페이지를 받아 그 페이지로 계산)
+        count_slots = st.checkbox(
+            "판매처 자리 수 보기 (유사 상품 묶기)",
+            help="조회 깊이까지 모든 페이지를 받아, 제목만 조금 다른 상품을 하나로 친 자리 수를 함께 보여줍니다"
+        )
+        
         # 제출 버튼
         submitted = st.form_submit_button("🔍 순위 확인", use_container_width=True)
     
@@ -406,7 +251,7 @@ def rank_checker_tab():
             st.error("⚠️ 검색어와 판매처명을 모두 입력해주세요.")
             return
         
-        keywords = [k.strip() for k in keywords_input.split(",") if k.strip()]
+        keywords = rank_engine.unique_keywords(k.strip() for k in keywords_input.split(","))
         
         if len(keywords) > 10:
             st.error("⚠️ 검색어는 최대 10개까지 입력 가능합니다.")
@@ -416,6 +261,17 @@ def rank_checker_tab():
             st.error("⚠️ 올바른 검색어를 입력해주세요.")
             return
         
+        # 남은 쿼터 안에서 조회 깊이 결정
+        try:
+            plan = job_planner.plan_rank_job(keywords, max_depth)
+        except (quota.QuotaExceeded, credentials.MissingCredentials) as e:
+            st.error(f"⚠️ {e}")
+            return
+        if plan.shrunk:
+            st.warning(f"⚠️ 남은 API 호출 수({plan.remaining:,}회)에 맞춰 조회 깊이를 "
+                       f"상위 {plan.max_depth}위로 줄였습니다.")
+        max_depth = plan.max_depth
+        
         # 검색 실행
         st.subheader("🔍 검색 결과")
         
@@ -424,46 +280,52 @@ def rank_checker_tab():
         status_text = st.empty()
         results_container = st.container()
         
-        all_results = {}
+        pages_per_keyword = len(rank_engine.page_starts(max_depth))
+        total_pages = len(keywords) * pages_per_keyword
+        done = {"pages": 0, "keywords": 0}
+        pages_by_keyword = {}
+        failed = set()
+        collector = near_duplicates.PageCollector() if count_slots else None
+        slots_by_keyword = {}
+        
+        # 엔진은 on_page 에 정규화한 키워드를 넘기므로 두 콜백 모두 같은 키로 집계
+        def on_page(keyword, start):
+            key = normalize_query(keyword)
+            pages_by_keyword[key] = pages_by_keyword.get(key, 0) + 1
+            done["pages"] += 1
+            progress_bar.progress(min(int(done["pages"] / total_pages * 100), 100))
+        
+        def on_result(keyword, best):
+            result = best[mall_name]
+            key = normalize_query(keyword)
+            # 조기 종료로 건너뛴 페이지도 완료로 계산
+            done["pages"] += pages_per_keyword - pages_by_keyword.get(key, 0)
+            progress_bar.progress(min(int(done["pages"] / total_pages * 100), 100))
+            done["keywords"] += 1
+            status_text.text(f"검색 중: {keyword} 완료 ({done['keywords']}/{len(keywords)})")
+            # 결과 표시 (오류/제한 시간으로 멈춘 키워드는 확인한 깊이까지만 유효)
+            checked_depth = None
+            if key in failed:
+                checked_depth = min(pages_by_keyword.get(key, 0) * rank_engine.PAGE_SIZE, max_depth)
+            if collector is not None:
+                slots_by_keyword[keyword] = (collector.slots(keyword, [mall_name]) or {}).get(mall_name)
+            with results_container:
+                show_rank_result(keyword, result, checked_depth, slots_by_keyword.get(keyword))
         
-        for i, keyword in enumerate(keywords):
-            status_text.text(f"검색 중: {keyword} ({i+1}/{len(keywords)})")
-            
-            def update_progress(progress):
-                current_progress = int((i / len(keywords)) * 100 + (progress / len(keywords)))
-                progress_bar.progress(min(current_progress, 100))
-            
-            # 검색 실행
-            result = get_top_ranked_product_by_mall(keyword, mall_name, update_progress)
-            all_results[keyword] = result
-            
-            # 결과 표시
+        def on_error(keyword, e):
+            failed.add(normalize_query(keyword))
             with results_container:
-                if result:
-                    st.success(f"✅ **{keyword}** - {result['rank']}위 발견!")
-                    
-                    col1, col2 = st.columns([2, 1])
-                    with col1:
-                        st.write(f"**상품명:** {result['title']}")
-                        st.write(f"**순위:** {result['rank']}위")
-                        st.write(f"**가격:** {int(result['price']):,}원")
-                        st.write(f"**쇼핑몰:** {result['mallName']}")
-                    
-                    with col2:
-                        st.link_button("🛒 상품 보기", result['link'])
-                    
-                    st.markdown("---")
-                else:
-                    st.error(f"❌ **{keyword}** - 검색 결과 없음")
-                    st.markdown("---")
-            
-            # 최종 진행률 업데이트
-            final_progress = int(((i + 1) / len(keywords)) * 100)
-            progress_bar.progress(final_progress)
-            
-            # API 호출 간격 조절
-            if i < len(keywords) - 1:
-                time.sleep(0.1)
+                st.error(f"API 요청 오류 ({keyword}): {e}")
+        
+        # 모든 키워드 × 페이지 요청을 동시 실행 (동시 요청 수는 RANK_CONCURRENCY)
+        status_text.text(f"검색 중: {len(keywords)}개 키워드 동시 조회")
+        # 작업 저널에 기록하며 실행 - 중간에 끊긴 같은 작업은 끝난 키워드를 건너뛰고 이어서 조회
+        all_results = job_journal.run_rank_job(
+            keywords, [mall_name], max_depth=max_depth, on_result=on_result,
+            on_page=on_page, on_error=on_error,
+            scan_mode="full" if count_slots else None, collector=collector
+        )
+        all_results = {keyword: (best or {}).get(mall_name) for keyword, best in all_results.items()}
         
         # 검색 완료
         status_text.text("✅ 모든 검색이 완료되었습니다!")
@@ -481,6 +343,19 @@ def rank_checker_tab():
             st.metric("발견된 상품", found_count)
         with col3:
             st.metric("발견율", f"{(found_count/total_count*100):.1f}%")
+        
+        if slots_by_keyword:
+            import pandas as pd
+            st.dataframe(pd.DataFrame([
+                {
+                    "검색어": keyword,
+                    "순위": all_results[keyword]["rank"] if all_results.get(keyword) else None,
+                    "조회 범위": f"상위 {slots['depth']}위" if slots else "-",
+                    "판매처 상품 수": slots["items"] if slots else None,
+                    "자리 수 (유사 상품 묶음)": slots["groups"] if slots else None,
+                }
+                for keyword, slots in ((k, slots_by_keyword.get(k)) for k in keywords)
+            ]), use_container_width=True)
 
 def related_keywords_tab():
     """연관검색어 탭"""
@@ -495,6 +370,14 @@ def related_keywords_tab():
             help="연관검색어를 찾을 키워드를 입력하세요"
         )
         
+        pages = st.slider(
+            "분석할 상품 페이지 수",
+            min_value=1,
+            max_value=10,
+            value=related_pipeline.RELATED_PAGES,
+            help="페이지당 상품 100개의 상품명을 분석합니다 (페이지는 동시에 조회)"
+        )
+        
         submitted = st.form_submit_button("🔍 연관검색어 조회", use_container_width=True)
     
     if submitted:
@@ -503,7 +386,7 @@ def related_keywords_tab():
             return
         
         with st.spinner(f"'{query}' 키워드의 연관검색어를 조회하고 있습니다..."):
-            related_keywords = get_related_keywords(query.strip())
+            related_keywords = get_related_keywords(query.strip(), pages)
         
         if related_keywords:
             st.success(f"✅ '{query}' 키워드의 연관검색어 {len(related_keywords)}개를 찾았습니다!")
@@ -537,6 +420,75 @@ def related_keywords_tab():
         else:
             st.warning(f"❌ '{query}' 키워드의 연관검색어를 찾을 수 없습니다.")
             st.info("다른 키워드로 시도해보세요.")
+    
+    keyword_graph_section()
+
+def keyword_graph_section():
+    """연관검색어 그래프 확장 탐색"""
+    st.markdown("---")
+    st.subheader("🌐 연관검색어 확장 탐색")
+    st.markdown("시드 키워드에서 연관검색어를 단계별로 자동 확장합니다.")
+    
+    with st.form("keyword_graph_form"):
+        seed = st.text_input(
+            "시드 키워드",
+            placeholder="예: 키보드",
+            help="확장을 시작할 키워드를 입력하세요"
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            depth = st.slider("확장 깊이", min_value=1, max_value=4, value=keyword_crawler.CRAWL_DEPTH)
+        with col2:
+            node_budget = st.slider("최대 키워드 수", min_value=10, max_value=500,
+                                    value=keyword_crawler.CRAWL_NODE_BUDGET, step=10)
+        
+        submitted = st.form_submit_button("🌐 확장 탐색", use_container_width=True)
+    
+    if submitted:
+        if not seed.strip():
+            st.error("⚠️ 시드 키워드를 입력해주세요.")
+            return
+        
+        status_text = st.empty()
+        expanded = {"nodes": 0}
+        
+        def on_node(keyword, related):
+            expanded["nodes"] += 1
+            status_text.text(f"확장 중: {keyword} ({expanded['nodes']}개 노드 완료)")
+        
+        with st.spinner(f"'{seed}' 키워드를 확장하고 있습니다..."):
+            graph = keyword_crawler.KeywordCrawler(depth=depth, node_budget=node_budget).crawl(
+                seed.strip(), on_node=on_node
+            )
+        status_text.empty()
+        
+        st.success(f"✅ 키워드 {len(graph['nodes'])}개, 연결 {len(graph['edges'])}개를 찾았습니다!")
+        
+        import pandas as pd
+        
+        nodes_df = pd.DataFrame(
+            [{"키워드": k, "깊이": d} for k, d in graph["nodes"].items()]
+        )
+        edges_df = pd.DataFrame(
+            [{"출발": s, "도착": t, "가중치": w} for s, t, w in graph["edges"]]
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("**키워드 목록**")
+            st.dataframe(nodes_df, use_container_width=True)
+        with col2:
+            st.write("**연결 (가중치순)**")
+            if not edges_df.empty:
+                edges_df = edges_df.sort_values("가중치", ascending=False)
+            st.dataframe(edges_df, use_container_width=True)
+        
+        st.text_area(
+            "발견한 키워드 (복사용)",
+            value=", ".join(graph["nodes"]),
+            height=100
+        )
 
 def search_volume_tab():
     """검색수 조회 탭"""
@@ -578,7 +530,7 @@ def search_volume_tab():
             st.error("⚠️ 검색어를 입력해주세요.")
             return
         
-        keywords = [k.strip() for k in keywords_input.split(",") if k.strip()]
+        keywords = rank_engine.unique_keywords(k.strip() for k in keywords_input.split(","))
         
         if len(keywords) > 5:
             st.error("⚠️ 검색어는 최대 5개까지 입력 가능합니다.")
@@ -595,7 +547,11 @@ def search_volume_tab():
             st.success(f"✅ {len(results)}개 키워드의 검색수를 분석했습니다!")
             
             # 결과 타입 표시
-            st.info("🎯 **고도화된 추정 시스템** 사용: 5개 검색 API + 키워드 특성 분석 + 동적 PC/모바일 분할")
+            ads_count = sum(1 for r in results if r.get('source') == 'ads')
+            if ads_count:
+                st.info(f"🎯 **네이버 광고 API 실제 데이터**: {ads_count}개 키워드")
+            if ads_count < len(results):
+                st.info("🎯 **고도화된 추정 시스템** 사용: 5개 검색 API + 키워드 특성 분석 + 동적 PC/모바일 분할")
             
             # 결과 테이블 표시
             st.subheader("📈 월간 검색수 분석 결과")
@@ -610,7 +566,8 @@ def search_volume_tab():
                     "PC 검색수": f"{result['monthly_pc_qc']:,}",
                     "모바일 검색수": f"{result['monthly_mobile_qc']:,}",
                     "전체 검색수": f"{result['monthly_pc_qc'] + result['monthly_mobile_qc']:,}",
-                    "경쟁도": result['competition']
+                    "경쟁도": result['competition'],
+                    "출처": "광고 API" if result.get('source') == 'ads' else "추정"
                 })
             
             df = pd.DataFrame(df_data)
@@ -618,6 +575,7 @@ def search_volume_tab():
             
             # 개별 키워드 상세 정보
             st.subheader("📋 상세 정보")
+            characteristics = volume_estimator.keyword_characteristics([r['keyword'] for r in results])
             
             for result in results:
                 with st.expander(f"🔍 {result['keyword']} 상세 정보"):
@@ -680,33 +638,7 @@ def search_volume_tab():
                     st.write(f"**경쟁도**: {result['competition']}")
                     
                     # 키워드 특성 분석 (새로 추가)
-                    keyword = result['keyword']
-                    characteristics = []
-                    
-                    # 언어 특성
-                    korean_chars = len([c for c in keyword if ord(c) >= 0xAC00 and ord(c) <= 0xD7A3])
-                    if korean_chars > 0:
-                        characteristics.append("한글 키워드")
-                    else:
-                        characteristics.append("영문/숫자 키워드")
-                    
-                    # 길이 특성
-                    if len(keyword) <= 2:
-                        characteristics.append("단어형(높은 검색량)")
-                    elif len(keyword) <= 4:
-                        characteristics.append("일반형")
-                    else:
-                        characteristics.append("구문형(상세 검색)")
-                    
-                    # 카테고리 특성
-                    if any(word in keyword for word in ['게임', '앱', '모바일', '폰', '스마트']):
-                        characteristics.append("모바일 친화적")
-                    elif any(word in keyword for word in ['업무', '오피스', '작업', '개발', 'PC']):
-                        characteristics.append("PC 친화적")
-                    else:
-                        characteristics.append("일반적")
-                    
-                    st.write(f"**키워드 특성**: {' | '.join(characteristics)}")
+                    st.write(f"**키워드 특성**: {characteristics[result['keyword']]}")
             
             # 요약 정보
             st.subheader("📊 전체 요약")
@@ -0,0 +1,58 @@
+"""
+검색 결과 수(total) 전용 동시 조회
+Copyright ⓒ 2025 happy. All rights reserved.
+
+검색수 추정에는 각 버티컬 응답의 total 값만 필요하므로 display=1 로 가장 작은
+응답만 받습니다. 모든 키워드 × 버티컬 요청을 하나의 이벤트 루프에서 동시에
+실행하고 동시 요청 수는 세마포어로 제한합니다.
+"""
+
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import naver_api
+
+# total 만 필요할 때 요청할 항목 수 (API 최솟값)
+COUNT_DISPLAY = 1
+MAX_TOTAL = 1000000
+DEFAULT_CONCURRENCY = int(os.getenv("PROBE_CONCURRENCY", "10"))
+
+def count_total(vertical, keyword):
+    """한 버티컬의 검색 결과 수 조회 (최대 MAX_TOTAL)"""
+    result = naver_api.search(vertical, keyword, display=COUNT_DISPLAY)
+    return min(result.get("total", 0), MAX_TOTAL)
+
+async def probe_counts_async(keywords, verticals=None, concurrency=None,
+                             on_keyword=None, count=None):
+    """키워드 × 버티컬 결과 수를 동시 조회 ({키워드: {버티컬: total}})
+
+    실패한 버티컬은 기존 추정 로직과 같이 0 으로 채웁니다.
+    """
+    verticals = verticals or naver_api.SEARCH_VERTICALS
+    concurrency = max(1, concurrency or DEFAULT_CONCURRENCY)
+    count = count or count_total
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def probe(keyword, vertical):
+            async with semaphore:
+                try:
+                    return await loop.run_in_executor(executor, count, vertical, keyword)
+                except Exception:
+                    return 0
+
+        async def probe_keyword(keyword):
+            totals = await asyncio.gather(*(probe(keyword, vertical) for vertical in verticals))
+            results[keyword] = dict(zip(verticals, totals))
+            if on_keyword:
+                on_keyword(keyword, results[keyword])
+
+        await asyncio.gather(*(probe_keyword(keyword) for keyword in dict.fromkeys(keywords)))
+    return {keyword: results[keyword] for keyword in keywords}
+
+def probe_counts(keywords, verticals=None, concurrency=None, on_keyword=None):
+    """probe_counts_async 의 동기 실행 버전"""
+    return asyncio.run(probe_counts_async(keywords, verticals, concurrency, on_keyword))
@@ -0,0 +1,115 @@
+"""
+검색 API 결과 수 기반 월간 검색수 일괄 추정 (pandas/NumPy 벡터 연산)
+Copyright ⓒ 2025 happy. All rights reserved.
+
+get_enhanced_search_volume_estimation 의 가중치, 한글/길이 보정, PC/모바일 분할,
+경쟁도 구간을 키워드 한 개씩이 아니라 열 단위 연산으로 한 번에 계산합니다.
+입력은 keyword + 버티컬별 total 열을 가진 표이며, 캐시된 결과 수만 있으면
+수만 개 키워드도 API 호출 없이 바로 추정할 수 있습니다.
+"""
+
+import numpy as np
+import pandas as pd
+
+VERTICALS = ("shop", "blog", "news", "webkr", "image")
+# 가중치: 쇼핑(30%) + 블로그(25%) + 웹(20%) + 뉴스(15%) + 이미지(10%)
+WEIGHTS = {"shop": 0.30, "blog": 0.25, "webkr": 0.20, "news": 0.15, "image": 0.10}
+MOBILE_WORDS = ['게임', '앱', '모바일', '폰', '스마트']
+PC_WORDS = ['업무', '오피스', '작업', '개발', 'PC']
+
+MOBILE_PATTERN = "|".join(MOBILE_WORDS)
+PC_PATTERN = "|".join(PC_WORDS)
+KOREAN_PATTERN = "[가-힣]"
+
+def totals_frame(all_totals):
+    """{키워드: {버티컬: total}} 을 추정 입력 표로 변환"""
+    df = pd.DataFrame.from_dict(all_totals, orient="index").reindex(columns=list(VERTICALS))
+    df = df.fillna(0).astype("int64")
+    df.index.name = "keyword"
+    return df.reset_index()
+
+def keyword_features(keywords):
+    """키워드 특성 열 계산 (한글 여부, 길이, 모바일/PC 친화 키워드 여부)"""
+    keywords = pd.Series(keywords, dtype="object").astype(str)
+    return pd.DataFrame({
+        "keyword": keywords.values,
+        "is_korean": keywords.str.contains(KOREAN_PATTERN, regex=True).values,
+        "length": keywords.str.len().values,
+        "is_mobile": keywords.str.contains(MOBILE_PATTERN, regex=True).values,
+        "is_pc": keywords.str.contains(PC_PATTERN, regex=True).values,
+    })
+
+def estimate_volumes(totals):
+    """버티컬별 total 표로 PC/모바일 검색수, 경쟁도를 한 번에 추정
+
+    totals 는 keyword 열과 shop/blog/news/webkr/image 열을 가진 DataFrame 입니다.
+    """
+    features = keyword_features(totals["keyword"])
+    counts = {v: totals[v].to_numpy(dtype="float64") if v in totals else np.zeros(len(totals))
+              for v in VERTICALS}
+
+    weighted_score = sum(counts[v] * WEIGHTS[v] for v in VERTICALS)
+
+    # 한글 키워드는 검색량이 높은 편, 영문 키워드는 상대적으로 낮음
+    correction_factor = np.where(features["is_korean"], 1.2, 0.8)
+
+    # 짧은 키워드는 검색량 높음, 긴 키워드는 검색량 낮음
+    length = features["length"].to_numpy()
+    length_factor = np.select([length <= 2, length <= 4, length <= 6], [1.5, 1.2, 1.0], default=0.8)
+
+    base_monthly = weighted_score * correction_factor * length_factor * 0.12
+    estimated_monthly = np.clip(np.trunc(base_monthly), 50, 999999).astype("int64")
+
+    # 키워드 특성에 따른 동적 PC/모바일 분할
+    is_mobile = features["is_mobile"].to_numpy()
+    is_pc = features["is_pc"].to_numpy()
+    mobile_ratio = np.select([is_mobile, is_pc], [0.75, 0.45], default=0.65)
+    pc_ratio = np.select([is_mobile, is_pc], [0.25, 0.55], default=0.35)
+
+    # 경쟁도 분석 (다차원적) + 상업적 경쟁도
+    total_results = sum(counts[v] for v in VERTICALS)
+    level = np.select([total_results > 100000, total_results > 20000], ["높음", "보통"], default="낮음")
+    commercial_ratio = counts["shop"] / np.maximum(total_results, 1)
+    kind = np.select([commercial_ratio > 0.4, commercial_ratio > 0.2],
+                     ["(상업적)", "(일반)"], default="(정보성)")
+
+    result = pd.DataFrame({"keyword": features["keyword"]})
+    for v in VERTICALS:
+        result[v] = counts[v].astype("int64")
+    result["monthly_pc_qc"] = (estimated_monthly * pc_ratio).astype("int64")
+    result["monthly_mobile_qc"] = (estimated_monthly * mobile_ratio).astype("int64")
+    result["competition"] = np.char.add(level.astype(str), kind.astype(str))
+    return result
+
+def keyword_characteristics(keywords):
+    """화면 표시용 키워드 특성 문자열 ("한글 키워드 | 일반형 | 일반적")"""
+    features = keyword_features(keywords)
+    language = np.where(features["is_korean"], "한글 키워드", "영문/숫자 키워드")
+    length = features["length"].to_numpy()
+    length_type = np.select([length <= 2, length <= 4],
+                            ["단어형(높은 검색량)", "일반형"], default="구문형(상세 검색)")
+    category = np.select([features["is_mobile"], features["is_pc"]],
+                         ["모바일 친화적", "PC 친화적"], default="일반적")
+    return pd.Series(
+        [" | ".join(parts) for parts in zip(language, length_type, category)],
+        index=features["keyword"]
+    )
+
+def to_results(estimates):
+    """추정 표를 기존 get_enhanced_search_volume_estimation 결과 dict 목록으로 변환"""
+    results = []
+    for row in estimates.itertuples(index=False):
+        results.append({
+            'keyword': row.keyword,
+            'monthly_pc_qc': int(row.monthly_pc_qc),
+            'monthly_mobile_qc': int(row.monthly_mobile_qc),
+            'competition': row.competition,
+            'data_sources': {
+                'shop': int(row.shop),
+                'blog': int(row.blog),
+                'web': int(row.webkr),
+                'news': int(row.news),
+                'image': int(row.image)
+            }
+        })
+    return results